@@ -0,0 +1,80 @@
+import hashlib
+import os
+import threading
+from flask import abort, send_from_directory, url_for
+
+
+class AssetManifest:
+    """Content-hashed names for the files under the static folder.
+
+    "css/base.css" maps to "css/base.3f2a9c01d4e5.css": the name changes
+    whenever the bytes do, so browsers can keep a copy for a year without
+    ever asking again and still pick up a deploy straight away.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self.names = {}    # "css/base.css" -> "css/base.<digest>.css"
+        self.sources = {}  # the reverse
+        self.scan()
+
+    def scan(self):
+        names = {}
+        for root, _, files in os.walk(self.directory):
+            for filename in files:
+                path = os.path.join(root, filename)
+                with open(path, "rb") as f:
+                    digest = hashlib.sha256(f.read()).hexdigest()[:12]
+                source = os.path.relpath(path, self.directory).replace(os.sep, "/")
+                stem, ext = os.path.splitext(source)
+                names[source] = f"{stem}.{digest}{ext}"
+        with self._lock:
+            self.names = names
+            self.sources = {hashed: source for source, hashed in names.items()}
+
+    def hashed(self, source):
+        return self.names.get(source)
+
+    def source(self, hashed):
+        return self.sources.get(hashed)
+
+
+def init_assets(app):
+    """Serve the static folder under fingerprinted /assets/ URLs.
+
+    Templates link files with asset_url('css/base.css'); the response is
+    marked immutable with a max-age of ASSET_MAX_AGE. In debug mode the
+    folder is rescanned on every call so edits show up without a restart.
+    Files that aren't in the manifest fall back to the plain /static/ URL.
+    """
+    manifest = AssetManifest(app.static_folder)
+    max_age = app.config.get('ASSET_MAX_AGE', 365 * 24 * 3600)
+    app.extensions['assets'] = manifest
+
+    def asset_url(filename):
+        if app.debug:
+            manifest.scan()
+        hashed = manifest.hashed(filename)
+        if hashed is None:
+            return url_for('static', filename=filename)
+        return url_for('assets', filename=hashed)
+
+    def serve_asset(filename):
+        # An old digest (from a page rendered before a deploy) must not be
+        # answered with today's bytes, or they'd be cached under it for good
+        source = manifest.source(filename)
+        if source is None:
+            abort(404)
+        response = send_from_directory(manifest.directory, source, max_age=max_age)
+        if response.direct_passthrough:
+            # The files are a few KB; holding them in memory lets the
+            # compression layer gzip them (once, via its cache)
+            response.direct_passthrough = False
+            response.make_sequence()
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+
+    app.add_url_rule("/assets/<path:filename>", "assets", serve_asset)
+    app.jinja_env.globals['asset_url'] = asset_url
@@ -0,0 +1,178 @@
+import threading
+from datetime import date, datetime, timedelta
+from typing import NamedTuple
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from cache import LRUCache
+from database import db, database_epoch, use_primary
+from models import Schedule, DayOfWeek
+import inventory
+
+
+class SlotView(NamedTuple):
+    """One bookable occurrence, with everything booking.html needs precomputed"""
+    schedule_id: int
+    date: date
+    start: datetime
+    end: datetime
+    minutes: int
+    price: float
+    seats_left: int
+
+    @property
+    def time_range(self):
+        return f"{self.start.strftime('%H:%M')} - {self.end.strftime('%H:%M')}"
+
+
+class DateView(NamedTuple):
+    """A date on the booking calendar and its slots"""
+    date: date
+    date_str: str
+    display_date: str
+    day_name: str
+    slots: tuple
+
+
+def schedules_by_day(facility_id):
+    """Fetch every schedule of a facility in one query, bucketed by DayOfWeek"""
+    by_day = {}
+    schedules = Schedule.query.filter_by(facility_id=facility_id).order_by(Schedule.start_time).all()
+    for schedule in schedules:
+        by_day.setdefault(schedule.day_of_week, []).append(schedule)
+    return by_day
+
+
+def build_availability(facility, start_date, days):
+    """Build the per-date slot list for `days` days starting at start_date.
+
+    Costs two queries (schedules + inventory range) whatever the horizon.
+    Only dates that have at least one scheduled slot are returned.
+    """
+    end_date = start_date + timedelta(days=days - 1)
+    by_day = schedules_by_day(facility.id)
+    remaining = inventory.remaining_by_slot(facility.id, start_date, end_date)
+
+    slot_minutes = facility.sport.default_slot_minutes
+    slot_length = timedelta(minutes=slot_minutes)
+    price = (slot_minutes / 60) * facility.price_per_hour
+
+    upcoming_dates = []
+    for i in range(days):
+        booking_date = start_date + timedelta(days=i)
+        schedules = by_day.get(DayOfWeek.from_date(booking_date))
+        if not schedules:
+            continue
+
+        slots = []
+        for schedule in schedules:
+            start = datetime.combine(booking_date, schedule.start_time)
+            slots.append(SlotView(
+                schedule_id=schedule.id,
+                date=booking_date,
+                start=start,
+                end=start + slot_length,
+                minutes=slot_minutes,
+                price=price,
+                # Occurrences nobody booked yet have no row and are at full capacity
+                seats_left=remaining.get((schedule.id, booking_date), inventory.slot_capacity(schedule)),
+            ))
+
+        upcoming_dates.append(DateView(
+            date=booking_date,
+            date_str=booking_date.strftime('%Y-%m-%d'),
+            display_date=booking_date.strftime('%A, %B %d, %Y'),
+            day_name=booking_date.strftime('%A'),
+            slots=tuple(slots),
+        ))
+    return tuple(upcoming_dates)
+
+
+def availability_to_json(upcoming_dates):
+    """Serialise build_availability output for the calendar API"""
+    return [
+        {
+            'date': date_info.date_str,
+            'display_date': date_info.display_date,
+            'slots': [
+                {
+                    'schedule_id': slot.schedule_id,
+                    'start': slot.start.strftime('%H:%M'),
+                    'end': slot.end.strftime('%H:%M'),
+                    'minutes': slot.minutes,
+                    'price': round(slot.price, 2),
+                    'seats_left': slot.seats_left,
+                }
+                for slot in date_info.slots
+            ],
+        }
+        for date_info in upcoming_dates
+    ]
+
+
+class AvailabilityCache:
+    """Per-facility availability windows for one app.
+
+    Keys carry the database epoch and the facility's version number, so
+    bumping the version makes every cached window for it unreachable and a
+    recreated database never sees the old one's entries.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.cache = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, facility, start_date, days):
+        key = (database_epoch(), facility.id, self.versions.get(facility.id, 0), start_date, days)
+        return self.cache.get_or_compute(key, lambda: self._build(facility, start_date, days))
+
+    @staticmethod
+    def _build(facility, start_date, days):
+        # A miss right after a booking's version bump must not read a lagging
+        # replica, or its stale seats would be cached under the new version
+        with use_primary():
+            return build_availability(facility, start_date, days)
+
+    def bump(self, facility_ids):
+        with self._lock:
+            for facility_id in facility_ids:
+                self.versions[facility_id] = self.versions.get(facility_id, 0) + 1
+
+
+def init_availability_cache(app):
+    app.extensions['availability'] = AvailabilityCache(
+        app.config['AVAILABILITY_CACHE_SIZE'], app.config['AVAILABILITY_CACHE_TTL'],
+    )
+
+
+def get_availability(facility, start_date, days):
+    """Cached build_availability; concurrent misses for one key compute once"""
+    return current_app.extensions['availability'].get(facility, start_date, days)
+
+
+def invalidate_facility(facility_id):
+    """Drop a facility's cached availability once the current transaction commits.
+
+    Bumping only after commit stops a concurrent reader from caching the
+    pre-commit state under the new version.
+    """
+    db.session.info.setdefault('availability_invalidations', set()).add(facility_id)
+
+
+def cache_stats():
+    return current_app.extensions['availability'].cache.stats()
+
+
+@event.listens_for(Session, 'after_commit')
+def _bump_versions(session):
+    facility_ids = session.info.pop('availability_invalidations', None)
+    if facility_ids and has_app_context():
+        cache = current_app.extensions.get('availability')
+        if cache is not None:
+            cache.bump(facility_ids)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_invalidations(session):
+    session.info.pop('availability_invalidations', None)
@@ -0,0 +1,158 @@
+"""Time the hot booking/schedule queries as the booking table grows.
+
+Usage: python benchmarks/bench_indexes.py [--sizes 10000,100000,1000000] [--no-compare]
+
+Runs against a throwaway SQLite file. For every size it reports the mean
+time per query with the model indexes in place and, unless --no-compare is
+given, with them dropped, plus the EXPLAIN QUERY PLAN of each query.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench_indexes.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+
+from sqlalchemy import event, text  # noqa: E402
+from main import create_app  # noqa: E402
+from database import db  # noqa: E402
+import models  # noqa: E402
+import bookings  # noqa: E402
+from seed_data import seed_database  # noqa: E402
+
+BATCH = 50_000
+REPEATS = 200
+BASE = datetime(2024, 1, 1, 8, 0)
+
+
+def grow_bookings(target, users):
+    """Bulk insert random bookings until the table holds `target` rows"""
+    current = db.session.query(models.Booking).count()
+    rng = random.Random(current)
+    statuses = [s.name for s in models.BookingStatus]
+    table = models.Booking.__table__
+    while current < target:
+        rows = []
+        for _ in range(min(BATCH, target - current)):
+            start = BASE + timedelta(hours=rng.randrange(0, 24 * 730))
+            rows.append({
+                "user_id": rng.randint(1, users),
+                "facility_id": rng.randint(1, 5),
+                "start": start,
+                "end": start + timedelta(minutes=90),
+                "seats": 1,
+                "price": 25.0,
+                "status": rng.choice(statuses),
+            })
+        db.session.execute(table.insert(), rows)
+        current += len(rows)
+    db.session.commit()
+
+
+def overlap_check(rng, users):
+    start = BASE + timedelta(hours=rng.randrange(0, 24 * 730))
+    end = start + timedelta(minutes=90)
+    return models.Booking.query.filter(
+        models.Booking.user_id == rng.randint(1, users),
+        models.Booking.start < end,
+        models.Booking.end > start,
+        models.Booking.status != models.BookingStatus.CANCELLED
+    ).first()
+
+
+def schedule_lookup(rng, users):
+    return models.Schedule.query.filter(
+        models.Schedule.facility_id == rng.randint(1, 5),
+        models.Schedule.start_time == datetime(2024, 1, 1, 15).time(),
+        models.Schedule.day_of_week == models.DayOfWeek(rng.randrange(7))
+    ).first()
+
+
+def history_page(rng, users):
+    return bookings.bookings_page(rng.randint(1, users), page_size=20)
+
+
+def history_stats(rng, users):
+    return bookings.booking_stats(rng.randint(1, users))
+
+
+QUERIES = [overlap_check, schedule_lookup, history_page, history_stats]
+
+
+def time_query(fn, users):
+    rng = random.Random(42)
+    started = time.perf_counter()
+    for _ in range(REPEATS):
+        fn(rng, users)
+        db.session.rollback()
+    return (time.perf_counter() - started) / REPEATS * 1e6
+
+
+def explain(fn, users):
+    """EXPLAIN QUERY PLAN of the first statement `fn` issues"""
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not captured:
+            captured.append((statement, parameters))
+
+    event.listen(db.engine, "before_cursor_execute", capture)
+    try:
+        fn(random.Random(0), users)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", capture)
+        db.session.rollback()
+    statement, parameters = captured[0]
+    plan = db.session.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)
+    return "; ".join(row[-1] for row in plan)
+
+
+def indexes():
+    return [index for table in db.metadata.sorted_tables for index in table.indexes]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--no-compare", action="store_true", help="skip the run without indexes")
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    app = create_app()
+    with app.app_context():
+        seed_database()
+        print(f"\n{'rows':>10} {'query':<16} {'indexed us':>12} {'no index us':>12}")
+        for size in sizes:
+            grow_bookings(size, args.users)
+            db.session.execute(text("ANALYZE"))
+            indexed = {fn.__name__: time_query(fn, args.users) for fn in QUERIES}
+            plans = {fn.__name__: explain(fn, args.users) for fn in QUERIES}
+
+            unindexed = {}
+            if not args.no_compare:
+                for index in indexes():
+                    index.drop(bind=db.engine)
+                unindexed = {fn.__name__: time_query(fn, args.users) for fn in QUERIES}
+                for index in indexes():
+                    index.create(bind=db.engine)
+
+            for fn in QUERIES:
+                name = fn.__name__
+                bare = f"{unindexed[name]:12.1f}" if name in unindexed else f"{'-':>12}"
+                print(f"{size:>10} {name:<16} {indexed[name]:12.1f} {bare}")
+        print("\nQuery plans (indexed):")
+        for name, plan in plans.items():
+            print(f"  {name}: {plan}")
+
+    os.remove(DB_PATH)
+
+
+if __name__ == "__main__":
+    main()
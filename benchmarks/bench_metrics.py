@@ -0,0 +1,88 @@
+"""Per-request cost of the /metrics instrumentation.
+
+Usage: python benchmarks/bench_metrics.py [--calls 200000] [--threads 8] [--requests 5000]
+
+Reports the time of one metrics.record_request call (counter increment plus
+histogram observation) on one thread and spread over several threads, and
+the end-to-end difference per request between an app with METRICS_ENABLED
+and one without, measured through the test client on a route that doesn't
+touch the database.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_metrics.db')}")
+
+from config import Config  # noqa: E402
+from main import create_app  # noqa: E402
+import metrics  # noqa: E402
+
+
+def time_record(calls):
+    started = time.perf_counter()
+    for i in range(calls):
+        metrics.record_request("routes.booking", "GET", "200", (i % 100) / 1000)
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def time_record_threads(calls, threads):
+    barrier = threading.Barrier(threads + 1)
+
+    def worker():
+        barrier.wait()
+        for i in range(calls):
+            metrics.record_request("routes.booking", "GET", "200", (i % 100) / 1000)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for worker_thread in workers:
+        worker_thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for worker_thread in workers:
+        worker_thread.join()
+    return (time.perf_counter() - started) / (calls * threads) * 1e6
+
+
+def time_requests(client, requests):
+    started = time.perf_counter()
+    for _ in range(requests):
+        client.get("/index")
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=200_000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"record_request, 1 thread:        {time_record(args.calls):.2f} us/call")
+    print(f"record_request, {args.threads} threads:       "
+          f"{time_record_threads(args.calls // args.threads, args.threads):.2f} us/call")
+
+    class NoMetrics(Config):
+        METRICS_ENABLED = False
+
+    clients = {"on": create_app().test_client(), "off": create_app(NoMetrics).test_client()}
+    results = {"on": [], "off": []}
+    for name, client in clients.items():
+        time_requests(client, args.requests // 10)  # warm up
+    for _ in range(args.rounds):
+        for name, client in clients.items():
+            results[name].append(time_requests(client, args.requests))
+    on, off = statistics.median(results["on"]), statistics.median(results["off"])
+    print(f"request with metrics:            {on:.1f} us")
+    print(f"request without metrics:         {off:.1f} us")
+    print(f"overhead per request:            {on - off:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
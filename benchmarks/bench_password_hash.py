@@ -0,0 +1,84 @@
+"""Logins per second per core for each password hash setting.
+
+Usage: python benchmarks/bench_password_hash.py [--methods scrypt:16384:8:1,pbkdf2:sha256:600000]
+                                                [--seconds 3] [--workers N]
+
+For every method it times check_password_hash in this process (one core)
+and then through passwords.verify_password with a pool of --workers
+processes kept busy by 2 x workers client threads, as a login burst would.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+from werkzeug.security import generate_password_hash, check_password_hash  # noqa: E402
+import passwords  # noqa: E402
+
+DEFAULT_METHODS = "scrypt:16384:8:1,scrypt:32768:8:1,scrypt:65536:8:1,pbkdf2:sha256:600000,pbkdf2:sha256:1000000"
+PASSWORD = "correct horse battery staple"
+
+
+def inline_rate(stored, seconds):
+    count, started = 0, time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        check_password_hash(stored, PASSWORD)
+        count += 1
+    return count / (time.perf_counter() - started)
+
+
+def pool_rate(method, stored, workers, seconds):
+    app = Flask(__name__)
+    app.config.update(PASSWORD_HASH_METHOD=method, PASSWORD_HASH_WORKERS=workers,
+                      PASSWORD_HASH_MAX_PENDING=workers * 2, PASSWORD_HASH_TIMEOUT=30)
+    done = {"ok": 0, "busy": 0}
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def client():
+        with app.app_context():
+            while not stop.is_set():
+                try:
+                    passwords.verify_password(stored, PASSWORD)
+                    key = "ok"
+                except passwords.HashingBusy:
+                    key = "busy"
+                with lock:
+                    done[key] += 1
+
+    with app.app_context():
+        passwords.verify_password(stored, PASSWORD)  # start the pool outside the timing
+    threads = [threading.Thread(target=client) for _ in range(workers * 2)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    passwords.shutdown()
+    return done["ok"] / elapsed, done["busy"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--methods", default=DEFAULT_METHODS)
+    parser.add_argument("--seconds", type=float, default=3)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    print(f"{'method':<24} {'ms/login':>9} {'logins/s/core':>14} {f'pool x{args.workers} logins/s':>20} {'busy':>6}")
+    for method in args.methods.split(","):
+        stored = generate_password_hash(PASSWORD, method)
+        rate = inline_rate(stored, args.seconds)
+        pooled, busy = pool_rate(method, stored, args.workers, args.seconds)
+        print(f"{method:<24} {1000 / rate:>9.1f} {rate:>14.1f} {pooled:>20.1f} {busy:>6}")
+
+
+if __name__ == "__main__":
+    main()
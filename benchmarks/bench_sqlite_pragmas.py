@@ -0,0 +1,140 @@
+"""Concurrent-write throughput of SQLite with and without the production pragmas.
+
+Usage: python benchmarks/bench_sqlite_pragmas.py [--writers 8] [--readers 4] [--seconds 5]
+
+For each profile a fresh SQLite file is created from the models. Writer
+threads repeatedly take a seat from one inventory row and insert a
+booking in the same transaction, while reader threads keep querying the
+booking table. Reports committed writes/s, reads/s and "database is
+locked" errors per profile.
+
+Measured on one CPU, 5 s per profile, three runs each (writes/s, reads/s):
+
+    8 writers, 4 readers   default    543-1206 / 318-1679
+                           production 1140-1306 / 1817-1996
+    8 writers, 0 readers   default    1019-1311
+                           production 3925-4195
+
+WAL with synchronous=NORMAL roughly triples write throughput on its own.
+Under the mixed load the write gain shrinks to about 10-20% on a good run
+for the default profile, since the threads then share one core. The
+steadier win there is on reads, which no longer wait behind a writer.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event, text  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+from config import Config  # noqa: E402
+from database import db, sqlite_pragma_hook, active_pragmas  # noqa: E402
+import models  # noqa: F401,E402
+
+PROFILES = {
+    "default": {},
+    "production": Config.SQLITE_PRAGMAS,
+}
+
+
+def make_engine(path, pragmas):
+    engine = create_engine(f"sqlite:///{path}")
+    if pragmas:
+        event.listen(engine, "connect", sqlite_pragma_hook(pragmas))
+    db.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO sport (id, name) VALUES (1, 'Bench')"))
+        conn.execute(text("INSERT INTO facility (id, name, sport_id, price_per_hour) VALUES (1, 'Bench', 1, 10)"))
+        conn.execute(text("INSERT INTO user (id, username, password_hash) VALUES (1, 'bench', 'x')"))
+        conn.execute(text(
+            "INSERT INTO schedule (id, facility_id, day_of_week, start_time, end_time, seats_available) "
+            "VALUES (1, 1, 'MONDAY', '08:00:00.000000', '10:00:00.000000', 1000000000)"
+        ))
+        conn.execute(text(
+            "INSERT INTO slot_inventory (facility_id, schedule_id, slot_date, capacity, remaining) "
+            "VALUES (1, 1, '2030-01-07', 1000000000, 1000000000)"
+        ))
+    return engine
+
+
+def run_profile(name, pragmas, writers, readers, seconds):
+    path = os.path.join(tempfile.mkdtemp(), f"{name}.db")
+    engine = make_engine(path, pragmas)
+    stop = threading.Event()
+    counts = {"writes": 0, "reads": 0, "locked": 0}
+    lock = threading.Lock()
+
+    def bump(key):
+        with lock:
+            counts[key] += 1
+
+    def writer():
+        start = datetime(2030, 1, 7, 8)
+        while not stop.is_set():
+            try:
+                with engine.begin() as conn:
+                    conn.execute(text(
+                        "UPDATE slot_inventory SET remaining = remaining - 1 "
+                        "WHERE id = 1 AND remaining >= 1"
+                    ))
+                    conn.execute(text(
+                        'INSERT INTO booking (user_id, facility_id, start, "end", seats, price, status) '
+                        "VALUES (1, 1, :start, :start, 1, 10, 'PENDING')"
+                    ), {"start": start})
+                bump("writes")
+            except OperationalError as error:
+                if "locked" not in str(error).lower():
+                    raise
+                bump("locked")
+
+    def reader():
+        while not stop.is_set():
+            try:
+                with engine.connect() as conn:
+                    conn.execute(text("SELECT COUNT(*), SUM(price) FROM booking WHERE user_id = 1")).one()
+                bump("reads")
+            except OperationalError as error:
+                if "locked" not in str(error).lower():
+                    raise
+                bump("locked")
+
+    threads = [threading.Thread(target=writer) for _ in range(writers)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    report = {
+        "pragmas": active_pragmas(engine, ["journal_mode", "synchronous", "busy_timeout"]),
+        "writes_per_s": counts["writes"] / seconds,
+        "reads_per_s": counts["reads"] / seconds,
+        "locked": counts["locked"],
+    }
+    engine.dispose()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args()
+
+    print(f"{'profile':<12} {'writes/s':>10} {'reads/s':>10} {'locked':>8}  pragmas")
+    for name, pragmas in PROFILES.items():
+        report = run_profile(name, pragmas, args.writers, args.readers, args.seconds)
+        print(f"{name:<12} {report['writes_per_s']:>10.1f} {report['reads_per_s']:>10.1f} "
+              f"{report['locked']:>8}  {report['pragmas']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Worker cold-start cost: import, create_app and the first request.
+
+Usage: python benchmarks/bench_startup.py [--runs 5]
+
+Every measurement runs in a fresh interpreter against a throwaway SQLite
+file that already holds the seeded schema, the way a new gunicorn worker
+finds it. SCHEMA_SYNC=always is the old behaviour (create_all plus column
+and index reflection on every boot); 'check' compares a stored schema
+fingerprint instead and 'never' skips schema work entirely.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = r"""
+import json, sys, time
+started = time.perf_counter()
+import main
+imported = time.perf_counter()
+app = main.create_app()
+created = time.perf_counter()
+client = app.test_client()
+with client.session_transaction() as session:
+    session["user_id"] = 1
+    session["role"] = "ADMIN"
+response = client.get("/view-facilities")
+first = time.perf_counter()
+assert response.status_code == 200, response.status_code
+# A second app in the same process has every module imported already, so
+# this is the schema/engine setup on its own
+main.create_app()
+warm = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "warm_create_app_ms": (warm - first) * 1000,
+    "first_request_ms": (first - created) * 1000,
+}))
+"""
+
+
+def run_child(env):
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD], cwd=ROOT, env=env, check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench_startup.db")
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{path}", SCHEMA_SYNC="always")
+    env.pop("REPLICA_DATABASE_URL", None)
+    subprocess.run(
+        [sys.executable, "-c", "from main import create_app\nfrom seed_data import seed_database\n"
+         "with create_app().app_context(): seed_database()"],
+        cwd=ROOT, env=env, check=True, capture_output=True,
+    )
+
+    print(f"{'SCHEMA_SYNC':<12} {'import ms':>10} {'create_app ms':>14} {'warm create_app ms':>19} "
+          f"{'first request ms':>17}")
+    for mode in ("always", "check", "never"):
+        env["SCHEMA_SYNC"] = mode
+        runs = [run_child(env) for _ in range(args.runs)]
+        median = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+        print(f"{mode:<12} {median['import_ms']:>10.1f} {median['create_app_ms']:>14.1f} "
+              f"{median['warm_create_app_ms']:>19.1f} {median['first_request_ms']:>17.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""First-hit latency of the template pages with and without the Jinja caches.
+
+Usage: python benchmarks/bench_templates.py [--runs 5]
+
+Each run is a fresh interpreter against a seeded throwaway SQLite file,
+like a new worker after a deploy. It reports create_app time and the
+first request to each page; "warm dir" means the bytecode cache directory
+was already filled by an earlier worker.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = ["/login", "/", "/view-facilities", "/booking/1", "/my-bookings"]
+
+CHILD = r"""
+import json, sys, time
+from main import create_app
+started = time.perf_counter()
+app = create_app()
+timings = {"create_app": (time.perf_counter() - started) * 1000}
+client = app.test_client()
+with client.session_transaction() as session:
+    session["user_id"] = 2
+    session["username"] = "bench"
+for page in json.loads(sys.argv[1]):
+    started = time.perf_counter()
+    response = client.get(page)
+    assert response.status_code == 200, (page, response.status_code)
+    timings[page] = (time.perf_counter() - started) * 1000
+print(json.dumps(timings))
+"""
+
+SETUPS = [
+    ("no caches (before)", {"TEMPLATE_BYTECODE_CACHE": "0", "TEMPLATE_PRECOMPILE": "0"}, False),
+    ("bytecode, cold dir", {"TEMPLATE_BYTECODE_CACHE": "1", "TEMPLATE_PRECOMPILE": "0"}, False),
+    ("bytecode, warm dir", {"TEMPLATE_BYTECODE_CACHE": "1", "TEMPLATE_PRECOMPILE": "0"}, True),
+    ("precompile only", {"TEMPLATE_BYTECODE_CACHE": "0", "TEMPLATE_PRECOMPILE": "1"}, False),
+    ("bytecode + precompile", {"TEMPLATE_BYTECODE_CACHE": "1", "TEMPLATE_PRECOMPILE": "1"}, True),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    cache_dir = os.path.join(workdir, "jinja_cache")
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+               TEMPLATE_CACHE_DIR=cache_dir, FRAGMENT_CACHE="off", PASSWORD_HASH_WORKERS="0")
+    env.pop("REPLICA_DATABASE_URL", None)
+    subprocess.run(
+        [sys.executable, "-c", "from main import create_app\nfrom seed_data import seed_database\n"
+         "with create_app().app_context(): seed_database()"],
+        cwd=ROOT, env=env, check=True, capture_output=True,
+    )
+
+    print(f"{'setup':<24} {'create_app':>11} " + " ".join(f"{page:>16}" for page in PAGES) + f" {'pages total':>12}")
+    for label, settings, warm in SETUPS:
+        runs = []
+        for _ in range(args.runs):
+            if warm:
+                subprocess.run([sys.executable, "-m", "flask", "--app", "main", "precompile-templates"],
+                               cwd=ROOT, env=dict(env, **settings), check=True, capture_output=True)
+            else:
+                shutil.rmtree(cache_dir, ignore_errors=True)
+            output = subprocess.run([sys.executable, "-c", CHILD, json.dumps(PAGES)], cwd=ROOT,
+                                    env=dict(env, **settings), check=True, capture_output=True, text=True).stdout
+            runs.append(json.loads(output.strip().splitlines()[-1]))
+        median = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+        print(f"{label:<24} {median['create_app']:>9.1f}ms "
+              + " ".join(f"{median[page]:>14.1f}ms" for page in PAGES)
+              + f" {sum(median[page] for page in PAGES):>10.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+"""Booking-storm load test: many members hitting "Book" as one slot opens.
+
+Usage:
+    python benchmarks/loadtest.py [--users 500] [--threads 32] [--processes 1]
+                                  [--mode client|http] [--url URL]
+                                  [--facility 3] [--cancel-rate 0.2]
+                                  [--output results.json]
+
+Each simulated member logs in, opens /booking/<facility>, POSTs a booking
+for the next occurrence of one of the facility's slots and, with
+--cancel-rate probability, cancels it again. "client" mode drives an app
+from main.create_app() through Flask's test client in-process; "http" mode
+serves one from a local threaded WSGI server (or uses --url, e.g. gunicorn
+wsgi:app) and talks real HTTP.
+
+Reports p50/p95/p99 latency per operation, throughput, booking outcomes,
+lock errors, and whether the inventory invariants held (no negative
+seats, no slot with more booked seats than capacity). Results are written
+as JSON tagged with the current git commit so runs can be compared.
+Login throttling is off and the password hash queue is sized for every
+thread for the locally built app, since all members log in from the same
+address at once; configure a --url server the same way.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import date, datetime, timedelta
+from http.cookiejar import CookieJar
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PASSWORD = "loadtest"
+OPERATIONS = ("login", "view", "book", "cancel")
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class TestClientSession:
+    """One member's session through Flask's test client"""
+
+    def __init__(self, app):
+        self.app = app
+        self.client = app.test_client()
+
+    def request(self, method, path, data=None):
+        response = self.client.open(path, method=method, data=data)
+        cookie = self.client.get_cookie("session")
+        return response.status_code, response.headers.get("Location", ""), cookie.value if cookie else None
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpSession:
+    """One member's session over real HTTP, without following redirects"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+        self.cookies = CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies), _NoRedirect)
+
+    def request(self, method, path, data=None):
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        req = urllib.request.Request(self.base_url + path, data=body, method=method)
+        try:
+            with self.opener.open(req, timeout=60) as response:
+                response.read()
+                status, location = response.status, response.headers.get("Location", "")
+        except urllib.error.HTTPError as error:
+            error.read()
+            status, location = error.code, error.headers.get("Location", "")
+        cookie = next((c.value for c in self.cookies if c.name == "session"), None)
+        return status, location, cookie
+
+
+def read_flashes(app, cookie):
+    """Decode the flashed messages out of a signed Flask session cookie"""
+    if not cookie:
+        return []
+    serializer = app.session_interface.get_signing_serializer(app)
+    try:
+        return [message for _, message in serializer.loads(cookie).get("_flashes", [])]
+    except Exception:
+        return []
+
+
+def setup_database(app, users, facility_id):
+    """Seed the reference data plus `users` members sharing one precomputed hash"""
+    from passwords import hash_password
+    from database import db
+    from seed_data import seed_database
+    import models
+
+    with app.app_context():
+        seed_database()
+        password_hash = hash_password(PASSWORD)
+        db.session.execute(models.User.__table__.insert(), [
+            {"username": f"member{i:05d}", "password_hash": password_hash, "role": models.Role.USER}
+            for i in range(users)
+        ])
+        db.session.commit()
+
+        # Target the next occurrence of each of the facility's weekly slots
+        targets = []
+        for schedule in models.Schedule.query.filter_by(facility_id=facility_id).all():
+            slot_date = date.today() + timedelta(days=1)
+            while models.DayOfWeek.from_date(slot_date) != schedule.day_of_week:
+                slot_date += timedelta(days=1)
+            targets.append((slot_date.isoformat(), schedule.id))
+        return targets
+
+
+def run_member(app, session, username, facility_id, targets, cancel_rate, rng, results):
+    def timed(op, method, path, data=None):
+        started = time.perf_counter()
+        status, location, cookie = session.request(method, path, data)
+        results["latency"][op].append((time.perf_counter() - started) * 1000)
+        if status >= 500:
+            results["server_errors"] += 1
+        return status, location, cookie
+
+    timed("login", "POST", "/login", {"username": username, "password": PASSWORD})
+    timed("view", "GET", f"/booking/{facility_id}")
+
+    booking_date, schedule_id = rng.choice(targets)
+    status, location, cookie = timed("book", "POST", f"/booking/{facility_id}", {
+        "booking_date": booking_date, "schedule_id": schedule_id, "seats": 1,
+    })
+    if "/my-bookings" in location:
+        results["outcomes"]["booked"] += 1
+    else:
+        messages = " ".join(read_flashes(app, cookie)).lower()
+        if "locked" in messages:
+            results["lock_errors"] += 1
+            results["outcomes"]["failed"] += 1
+        elif "seats left" in messages:
+            results["outcomes"]["full"] += 1
+        elif "already booked" in messages:
+            results["outcomes"]["overlap"] += 1
+        else:
+            results["outcomes"]["failed"] += 1
+        return
+
+    if rng.random() < cancel_rate:
+        import models
+        with app.app_context():
+            booking = models.Booking.query.join(models.User).filter(
+                models.User.username == username,
+                models.Booking.status != models.BookingStatus.CANCELLED,
+            ).order_by(models.Booking.id.desc()).first()
+            booking_id = booking.id if booking else None
+        if booking_id:
+            status, _, _ = timed("cancel", "POST", f"/cancel-booking/{booking_id}")
+            results["outcomes"]["cancelled" if status == 200 else "cancel_failed"] += 1
+
+
+def empty_results():
+    return {
+        "latency": {op: [] for op in OPERATIONS},
+        "outcomes": {key: 0 for key in ("booked", "full", "overlap", "failed", "cancelled", "cancel_failed")},
+        "lock_errors": 0,
+        "server_errors": 0,
+    }
+
+
+def merge(into, other):
+    for op in OPERATIONS:
+        into["latency"][op].extend(other["latency"][op])
+    for key, value in other["outcomes"].items():
+        into["outcomes"][key] += value
+    into["lock_errors"] += other["lock_errors"]
+    into["server_errors"] += other["server_errors"]
+
+
+def run_process(args, usernames, targets, seed):
+    """Run one process worth of members across `args.threads` threads"""
+    from main import create_app
+    app = create_app()
+
+    lock = threading.Lock()
+    pending = list(usernames)
+    totals = empty_results()
+
+    def worker(worker_id):
+        rng = random.Random(seed * 1000 + worker_id)
+        local = empty_results()
+        while True:
+            with lock:
+                if not pending:
+                    break
+                username = pending.pop()
+            session = TestClientSession(app) if args.mode == "client" else HttpSession(args.url)
+            try:
+                run_member(app, session, username, args.facility, targets, args.cancel_rate, rng, local)
+            except Exception as error:
+                local["outcomes"]["failed"] += 1
+                if "locked" in str(error).lower():
+                    local["lock_errors"] += 1
+        with lock:
+            merge(totals, local)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return totals
+
+
+def _process_entry(payload):
+    args, usernames, targets, seed = payload
+    return run_process(args, usernames, targets, seed)
+
+
+def check_invariants(app):
+    """Inventory never negative and never more booked seats than capacity"""
+    from sqlalchemy import func
+    from database import db
+    import models
+
+    with app.app_context():
+        negative = models.SlotInventory.query.filter(models.SlotInventory.remaining < 0).count()
+        booked = dict(
+            ((facility_id, start), seats) for facility_id, start, seats in
+            db.session.query(models.Booking.facility_id, models.Booking.start, func.sum(models.Booking.seats))
+            .filter(models.Booking.status != models.BookingStatus.CANCELLED)
+            .group_by(models.Booking.facility_id, models.Booking.start).all()
+        )
+        oversold = 0
+        mismatched = 0
+        for slot in models.SlotInventory.query.all():
+            schedule = db.session.get(models.Schedule, slot.schedule_id)
+            seats = booked.get((slot.facility_id, datetime.combine(slot.slot_date, schedule.start_time)), 0)
+            if seats > slot.capacity:
+                oversold += 1
+            if slot.capacity - slot.remaining != seats:
+                mismatched += 1
+        return {
+            "negative_seat_rows": negative,
+            "oversold_slots": oversold,
+            "inventory_mismatches": mismatched,
+            "held": negative == 0 and oversold == 0 and mismatched == 0,
+        }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=32, help="threads per process")
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--mode", choices=("client", "http"), default="client")
+    parser.add_argument("--url", help="existing server for http mode (default: start one locally)")
+    parser.add_argument("--database-url", help="database to seed (default: a throwaway SQLite file)")
+    parser.add_argument("--facility", type=int, default=3, help="facility every member books")
+    parser.add_argument("--cancel-rate", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default="loadtest_results.json")
+    args = parser.parse_args()
+
+    if not args.database_url:
+        args.database_url = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "loadtest.db")
+    # Must be set before main is imported so every process builds the same app
+    os.environ["DATABASE_URL"] = args.database_url
+    # Every simulated member logs in from this one address, all at once
+    os.environ.setdefault("LOGIN_THROTTLE_ENABLED", "0")
+    os.environ.setdefault("PASSWORD_HASH_MAX_PENDING", str(args.threads * args.processes))
+
+    from main import create_app
+    app = create_app()
+    targets = setup_database(app, args.users, args.facility)
+    if not targets:
+        parser.error(f"facility {args.facility} has no schedules")
+
+    server = None
+    if args.mode == "http" and not args.url:
+        from werkzeug.serving import WSGIRequestHandler, make_server
+
+        class QuietHandler(WSGIRequestHandler):
+            def log_request(self, *args, **kwargs):
+                pass
+
+        server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=QuietHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        args.url = f"http://127.0.0.1:{server.server_port}"
+
+    usernames = [f"member{i:05d}" for i in range(args.users)]
+    chunks = [usernames[i::args.processes] for i in range(args.processes)]
+
+    started = time.perf_counter()
+    if args.processes == 1:
+        results = run_process(args, chunks[0], targets, args.seed)
+    else:
+        results = empty_results()
+        with multiprocessing.Pool(args.processes) as pool:
+            payloads = [(args, chunk, targets, args.seed + i) for i, chunk in enumerate(chunks)]
+            for partial in pool.map(_process_entry, payloads):
+                merge(results, partial)
+    elapsed = time.perf_counter() - started
+
+    if server:
+        server.shutdown()
+
+    requests_made = sum(len(values) for values in results["latency"].values())
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "config": {key: value for key, value in vars(args).items() if key != "database_url"},
+        "elapsed_s": round(elapsed, 3),
+        "requests": requests_made,
+        "throughput_rps": round(requests_made / elapsed, 1) if elapsed else None,
+        "latency_ms": {
+            op: {
+                "count": len(values),
+                "p50": percentile(values, 50),
+                "p95": percentile(values, 95),
+                "p99": percentile(values, 99),
+            }
+            for op, values in results["latency"].items()
+        },
+        "outcomes": results["outcomes"],
+        "lock_errors": results["lock_errors"],
+        "server_errors": results["server_errors"],
+        "invariants": check_invariants(app),
+    }
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"{requests_made} requests in {elapsed:.2f}s ({report['throughput_rps']} req/s)")
+    for op, stats in report["latency_ms"].items():
+        if stats["count"]:
+            print(f"  {op:<7} n={stats['count']:<5} p50={stats['p50']:.1f}ms "
+                  f"p95={stats['p95']:.1f}ms p99={stats['p99']:.1f}ms")
+    print(f"  outcomes: {report['outcomes']}")
+    print(f"  lock errors: {report['lock_errors']}, server errors: {report['server_errors']}")
+    print(f"  invariants held: {report['invariants']['held']} {report['invariants']}")
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Bytes sent per page, and what the browser can cache across pages.
+
+Usage: python benchmarks/page_weight.py
+
+Seeds a throwaway SQLite file, logs in as a member and fetches every
+page through the test client. For each page it prints the HTML size,
+raw and gzipped (level 6), plus the static assets the page links to.
+Assets served with a long-lived Cache-Control are only downloaded once
+per deploy, so they are listed separately from the per-response bytes.
+"""
+import gzip
+import os
+import re
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "page_weight.db")
+os.environ.setdefault("PASSWORD_HASH_WORKERS", "0")
+
+from main import create_app  # noqa: E402
+from seed_data import seed_database  # noqa: E402
+
+PAGES = ["/login", "/register", "/", "/view-facilities", "/booking/1", "/my-bookings"]
+ASSET_LINK = re.compile(r'(?:href|src)="(/(?:static|assets)/[^"]+)"')
+
+
+def main():
+    app = create_app()
+    with app.app_context():
+        seed_database()
+    client = app.test_client()
+    client.post("/login", data={"username": "Ahmed", "password": "aaaaaa"})
+
+    print(f"{'page':<18} {'html':>9} {'html gz':>9}  assets (bytes, cache-control)")
+    total = 0
+    for page in PAGES:
+        response = client.get(page)
+        body = response.get_data()
+        total += len(body)
+        assets = []
+        for url in ASSET_LINK.findall(body.decode()):
+            asset = client.get(url)
+            assets.append(f"{url.rsplit('/', 1)[-1]} {len(asset.get_data())} {asset.headers.get('Cache-Control')}")
+            asset.close()
+        print(f"{page:<18} {len(body):>9,} {len(gzip.compress(body, 6)):>9,}  {'; '.join(assets) or '-'}")
+    print(f"{'total':<18} {total:>9,}")
+
+
+if __name__ == "__main__":
+    main()
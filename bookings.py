@@ -0,0 +1,147 @@
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from sqlalchemy import select, func, and_, or_
+from sqlalchemy.orm import joinedload
+from database import db
+from models import Booking, BookingStatus, Facility
+
+
+def encode_cursor(booking):
+    """Opaque keyset cursor pointing just past `booking` in (start, id) order"""
+    return f"{booking.start.isoformat()}_{booking.id}"
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; returns None for a missing or malformed cursor"""
+    if not cursor:
+        return None
+    try:
+        start, booking_id = cursor.rsplit('_', 1)
+        return datetime.fromisoformat(start), int(booking_id)
+    except ValueError:
+        return None
+
+
+def bookings_page(user_id, cursor=None, page_size=20):
+    """One page of a user's bookings, newest first, using keyset pagination on (start, id).
+
+    Returns (bookings, next_cursor); next_cursor is None on the last page.
+    Facility and sport are eager-loaded so the page costs one query.
+    """
+    query = Booking.query.options(
+        joinedload(Booking.facility).joinedload(Facility.sport)
+    ).filter(Booking.user_id == user_id)
+
+    position = decode_cursor(cursor)
+    if position:
+        start, booking_id = position
+        query = query.filter(or_(
+            Booking.start < start,
+            and_(Booking.start == start, Booking.id < booking_id),
+        ))
+
+    # Fetch one extra row to learn whether another page exists
+    rows = query.order_by(Booking.start.desc(), Booking.id.desc()).limit(page_size + 1).all()
+    if len(rows) > page_size:
+        return rows[:page_size], encode_cursor(rows[page_size - 1])
+    return rows, None
+
+
+def booking_stats(user_id):
+    """Counts per status and confirmed spend for a user, in one GROUP BY query"""
+    rows = db.session.execute(
+        select(Booking.status, func.count(Booking.id), func.coalesce(func.sum(Booking.price), 0))
+        .where(Booking.user_id == user_id)
+        .group_by(Booking.status)
+    )
+    stats = {'total': 0, 'spent': 0.0}
+    for status in BookingStatus:
+        stats[status.value] = 0
+    for status, count, price in rows:
+        stats['total'] += count
+        if status is None:
+            continue
+        stats[status.value] = count
+        if status == BookingStatus.CONFIRMED:
+            stats['spent'] = float(price)
+    return stats
+
+
+class IntervalIndex:
+    """Sorted (start, end) intervals answering "does [start, end) overlap anything?".
+
+    Intervals are kept sorted by start alongside a running maximum of their
+    ends, so a lookup is one bisect: everything starting before `end` is a
+    candidate, and one of them overlaps iff the largest end among them is
+    after `start`.
+    """
+
+    def __init__(self, intervals=()):
+        self._intervals = sorted(intervals)
+        self._rebuild()
+
+    def _rebuild(self):
+        self._starts = [start for start, _ in self._intervals]
+        self._max_ends = []
+        running = None
+        for _, end in self._intervals:
+            running = end if running is None or end > running else running
+            self._max_ends.append(running)
+
+    def __len__(self):
+        return len(self._intervals)
+
+    def overlaps(self, start, end):
+        i = bisect_left(self._starts, end)
+        return i > 0 and self._max_ends[i - 1] > start
+
+    def add(self, start, end):
+        i = bisect_right(self._intervals, (start, end))
+        self._intervals.insert(i, (start, end))
+        self._starts.insert(i, start)
+        running = end if i == 0 or end > self._max_ends[i - 1] else self._max_ends[i - 1]
+        self._max_ends.insert(i, running)
+        # Later running maxima only change until one already reaches `end`
+        for j in range(i + 1, len(self._max_ends)):
+            if self._max_ends[j] >= end:
+                break
+            self._max_ends[j] = end
+
+
+def load_interval_index(user_id, window_start, window_end):
+    """Build an IntervalIndex of a user's active bookings touching [window_start, window_end).
+
+    One range scan over the (user_id, start, end, status) index.
+    """
+    rows = db.session.execute(
+        select(Booking.start, Booking.end).where(
+            Booking.user_id == user_id,
+            Booking.start < window_end,
+            Booking.end > window_start,
+            Booking.status != BookingStatus.CANCELLED,
+        )
+    )
+    return IntervalIndex((start, end) for start, end in rows)
+
+
+def find_conflicts(user_id, slots):
+    """Return the (start, end) slots that clash with the user's bookings or with each other.
+
+    Used for a single booking as well as for validating several slots at
+    once (a basket or recurring series) with one query instead of N.
+    """
+    if not slots:
+        return []
+    index = load_interval_index(
+        user_id,
+        min(start for start, _ in slots),
+        max(end for _, end in slots),
+    )
+    conflicts = []
+    for start, end in slots:
+        if index.overlaps(start, end):
+            conflicts.append((start, end))
+        else:
+            # Later slots in the same batch must not overlap this one either
+            index.add(start, end)
+    return conflicts
@@ -0,0 +1,166 @@
+import os
+import zlib
+from itertools import chain
+from typing import NamedTuple
+from flask import current_app, render_template
+from sqlalchemy import event, select, update, insert
+from sqlalchemy.orm import Session, joinedload, selectinload
+from cache import LRUCache, DiskCache
+from database import db, database_epoch_table
+from models import Sport, Facility, Schedule
+
+# A single row whose version goes up in the same transaction as any change
+# to a facility, sport or schedule, so every worker agrees on it
+catalog_version = db.Table(
+    "catalog_version",
+    db.Column("id", db.Integer, primary_key=True),
+    db.Column("version", db.Integer, nullable=False),
+)
+_CATALOG_MODELS = (Facility, Sport, Schedule)
+
+
+class SportView(NamedTuple):
+    id: int
+    name: str
+
+
+class ScheduleGroup(NamedTuple):
+    """One time range and the days it runs on, e.g. '15:00 - 17:00' on 'Sunday, Tuesday'"""
+    time_slot: str
+    days: str
+
+
+class FacilityCard(NamedTuple):
+    """Everything a facility card on /view-facilities renders"""
+    id: int
+    name: str
+    sport_id: int
+    sport_name: str
+    location: str
+    price_per_hour: float
+    max_players: int
+    schedule_groups: tuple
+
+
+class Catalog(NamedTuple):
+    sports: tuple
+    facilities: tuple
+
+
+def group_schedules(schedules):
+    """Group schedules by time range, listing days in week order"""
+    groups = {}
+    for schedule in sorted(schedules, key=lambda s: (s.day_of_week.value, s.start_time)):
+        time_slot = f"{schedule.start_time.strftime('%H:%M')} - {schedule.end_time.strftime('%H:%M')}"
+        groups.setdefault(time_slot, []).append(schedule.get_day_name())
+    return tuple(ScheduleGroup(time_slot, ', '.join(days)) for time_slot, days in groups.items())
+
+
+def build_catalog():
+    """Load sports and active facilities with their sport and schedules in three queries"""
+    sports = Sport.query.order_by(Sport.id).all()
+    facilities = Facility.query.options(
+        joinedload(Facility.sport),
+        selectinload(Facility.schedules),
+    ).filter_by(is_active=True).order_by(Facility.id).all()
+
+    return Catalog(
+        sports=tuple(SportView(sport.id, sport.name) for sport in sports),
+        facilities=tuple(
+            FacilityCard(
+                id=facility.id,
+                name=facility.name,
+                sport_id=facility.sport_id,
+                sport_name=facility.sport.name,
+                location=facility.location,
+                price_per_hour=facility.price_per_hour,
+                max_players=facility.sport.max_players,
+                schedule_groups=group_schedules(facility.schedules),
+            )
+            for facility in facilities
+        ),
+    )
+
+
+def current_version():
+    """(database epoch, catalog version) in one query.
+
+    The version alone restarts after a reseed or drop_all, so cache keys
+    carry the epoch of the database too.
+    """
+    epoch, version = db.session.execute(select(
+        select(database_epoch_table.c.epoch).where(database_epoch_table.c.id == 1).scalar_subquery(),
+        select(catalog_version.c.version).where(catalog_version.c.id == 1).scalar_subquery(),
+    )).one()
+    return epoch, version or 0
+
+
+@event.listens_for(Session, 'after_flush')
+def _bump_catalog_version(session, flush_context):
+    # new/dirty/deleted still describe what was just flushed at this point.
+    # Bulk UPDATE statements on these models don't flush; CATALOG_CACHE_TTL
+    # is the backstop for those.
+    if not any(isinstance(obj, _CATALOG_MODELS) for obj in chain(session.new, session.dirty, session.deleted)):
+        return
+    conn = session.connection()
+    bumped = conn.execute(
+        update(catalog_version).where(catalog_version.c.id == 1).values(version=catalog_version.c.version + 1)
+    ).rowcount
+    if not bumped:
+        conn.execute(insert(catalog_version).values(id=1, version=1))
+
+
+class CatalogCache:
+    """Catalog snapshots and rendered fragments for one app"""
+
+    def __init__(self, app):
+        config = app.config
+        self.snapshots = LRUCache(maxsize=1, ttl=config['CATALOG_CACHE_TTL'])
+        if config.get('FRAGMENT_CACHE') == 'off':
+            self.fragments = None
+        elif config.get('FRAGMENT_CACHE') == 'disk':
+            directory = config.get('FRAGMENT_CACHE_DIR') or os.path.join(app.instance_path, 'fragments')
+            self.fragments = DiskCache(directory, maxsize=config['FRAGMENT_CACHE_SIZE'])
+        else:
+            # TTL only bounds how long a bulk edit that skipped the version bump can show
+            self.fragments = LRUCache(maxsize=config['FRAGMENT_CACHE_SIZE'], ttl=config['CATALOG_CACHE_TTL'])
+        self.digests = {}
+
+    def template_digest(self, template_name):
+        # Part of the key so a deploy with a changed template never reuses old HTML from disk
+        digest = self.digests.get(template_name)
+        if digest is None:
+            source, _, _ = current_app.jinja_env.loader.get_source(current_app.jinja_env, template_name)
+            digest = self.digests[template_name] = f"{zlib.crc32(source.encode()):08x}"
+        return digest
+
+
+def init_catalog_cache(app):
+    app.extensions['catalog'] = CatalogCache(app)
+
+
+def get_catalog(version=None):
+    """Immutable catalog snapshot for the given current_version()"""
+    if version is None:
+        version = current_version()
+    return current_app.extensions['catalog'].snapshots.get_or_compute(('catalog', version), build_catalog)
+
+
+def cached_fragment(template_name, version, build_context):
+    """HTML of template_name for this current_version(), from the fragment cache if possible.
+
+    build_context() is only called on a miss.
+    """
+    def render():
+        return render_template(template_name, **build_context())
+
+    caches = current_app.extensions['catalog']
+    if caches.fragments is None:
+        return render()
+    key = (template_name, caches.template_digest(template_name), version)
+    return caches.fragments.get_or_compute(key, render)
+
+
+def fragment_stats():
+    fragments = current_app.extensions['catalog'].fragments
+    return fragments.stats() if fragments is not None else {"enabled": False}
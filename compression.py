@@ -0,0 +1,119 @@
+import gzip
+import hashlib
+import threading
+import zlib
+from flask import current_app, request
+from cache import LRUCache
+
+# Compression level per content type; anything not listed (images, archives,
+# ...) is either already compressed or not worth it and is sent as is
+DEFAULT_LEVELS = {
+    "text/html": 6,
+    "application/json": 6,
+    "text/plain": 6,
+    "text/css": 9,
+    "text/javascript": 9,
+    "application/javascript": 9,
+    "image/svg+xml": 9,
+}
+
+
+def compress(body, encoding, level):
+    if encoding == "gzip":
+        # mtime=0 keeps the output a pure function of the body, so it can be cached
+        return gzip.compress(body, compresslevel=level, mtime=0)
+    return zlib.compress(body, level)
+
+
+def negotiate(accept_encodings):
+    """"gzip", "deflate" or None for a parsed Accept-Encoding header; gzip wins ties"""
+    best, best_quality = None, 0
+    for encoding in ("gzip", "deflate"):
+        quality = accept_encodings[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class Compressor:
+    """Compresses responses for one app and keeps the counters behind its stats.
+
+    Responses of the endpoints in cached_endpoints are compressed once per
+    distinct body: the key is a digest of the bytes, which costs a few
+    microseconds against the few hundred a gzip of a catalog page takes,
+    and can never serve a stale result.
+    """
+
+    def __init__(self, levels, min_size, cached_endpoints, cache_size):
+        self.levels = levels
+        self.min_size = min_size
+        self.cached_endpoints = frozenset(cached_endpoints)
+        self.cache = LRUCache(maxsize=cache_size, ttl=24 * 3600)
+        self._lock = threading.Lock()
+        self.counters = {"compressed": 0, "bytes_in": 0, "bytes_out": 0}
+
+    def _compressed(self, body, encoding, level, endpoint):
+        if endpoint not in self.cached_endpoints:
+            return compress(body, encoding, level)
+        key = (encoding, level, hashlib.blake2b(body, digest_size=16).digest())
+        return self.cache.get_or_compute(key, lambda: compress(body, encoding, level))
+
+    def process(self, response):
+        level = self.levels.get(response.mimetype)
+        if level is None:
+            return response
+        response.vary.add("Accept-Encoding")
+        if (response.status_code < 200 or response.status_code in (204, 206, 304)
+                or response.direct_passthrough or response.is_streamed
+                or "Content-Encoding" in response.headers
+                or response.cache_control.no_transform):
+            return response
+        encoding = negotiate(request.accept_encodings)
+        if encoding is None:
+            return response
+        body = response.get_data()
+        if len(body) < self.min_size:
+            return response
+
+        compressed = self._compressed(body, encoding, level, request.endpoint)
+        response.set_data(compressed)
+        response.headers["Content-Encoding"] = encoding
+        # The bytes differ from the uncompressed representation, so a strong
+        # validator no longer applies
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        with self._lock:
+            self.counters["compressed"] += 1
+            self.counters["bytes_in"] += len(body)
+            self.counters["bytes_out"] += len(compressed)
+        return response
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+        stats["cache"] = self.cache.stats()
+        return stats
+
+
+def init_compression(app):
+    """gzip/deflate responses of COMPRESS_MIN_SIZE bytes or more.
+
+    The level comes from COMPRESS_LEVELS by content type. Streamed and
+    file pass-through responses, partial content and anything that already
+    has a Content-Encoding are left alone.
+    """
+    if not app.config.get('COMPRESS_ENABLED', True):
+        return
+    compressor = Compressor(
+        app.config.get('COMPRESS_LEVELS') or DEFAULT_LEVELS,
+        app.config.get('COMPRESS_MIN_SIZE', 500),
+        app.config.get('COMPRESS_CACHED_ENDPOINTS', ()),
+        app.config.get('COMPRESS_CACHE_SIZE', 256),
+    )
+    app.extensions['compression'] = compressor
+    app.after_request(compressor.process)
+
+
+def get_compressor():
+    return current_app.extensions.get('compression')
@@ -3,4 +3,129 @@ import os
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'secret-key'
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///settle.db'
-    SQLALCHEMY_TRACK_MODIFICATIONS = False      
\ No newline at end of file
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Schema sync at startup: 'check' (only when the models changed), 'always' or 'never'
+    # ('never' expects `flask --app main init-db` to be run on deploy)
+    SCHEMA_SYNC = os.environ.get('SCHEMA_SYNC') or 'check'
+    # Optional read replica; plain reads are routed to it by database.RoutingSession
+    SQLALCHEMY_BINDS = {'replica': os.environ['REPLICA_DATABASE_URL']} if os.environ.get('REPLICA_DATABASE_URL') else {}
+    READ_REPLICA_STICKY_SECONDS = float(os.environ.get('READ_REPLICA_STICKY_SECONDS') or 5)
+    # Seconds between copies of a local SQLite primary into a SQLite replica (0 = never); done by
+    # `flask --app main sync-replica`, or in-process by `python main.py`
+    REPLICA_SYNC_INTERVAL = float(os.environ.get('REPLICA_SYNC_INTERVAL') or 2)
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE') or 5),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW') or 10),
+        'pool_timeout': float(os.environ.get('DB_POOL_TIMEOUT') or 30),
+        'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE') or 1800),
+        'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', '1') != '0',
+    }
+
+    # How far ahead members may book, and how many days the booking page shows up front
+    BOOKING_HORIZON_DAYS = int(os.environ.get('BOOKING_HORIZON_DAYS') or 84)
+    BOOKING_PAGE_DAYS = int(os.environ.get('BOOKING_PAGE_DAYS') or 7)
+
+    # Per-worker availability cache; entries are also invalidated on booking/cancel
+    AVAILABILITY_CACHE_SIZE = int(os.environ.get('AVAILABILITY_CACHE_SIZE') or 256)
+    AVAILABILITY_CACHE_TTL = float(os.environ.get('AVAILABILITY_CACHE_TTL') or 30)
+
+    # /view-facilities caches the catalog and its rendered cards per catalog
+    # version, which goes up whenever a facility, sport or schedule is saved.
+    # The TTL only matters for edits made with bulk UPDATEs.
+    CATALOG_CACHE_TTL = float(os.environ.get('CATALOG_CACHE_TTL') or 60)
+    # Rendered-card store: 'memory' (per worker LRU), 'disk' (shared by the
+    # workers on a host, in FRAGMENT_CACHE_DIR, default instance/fragments) or 'off'
+    FRAGMENT_CACHE = os.environ.get('FRAGMENT_CACHE') or 'memory'
+    FRAGMENT_CACHE_DIR = os.environ.get('FRAGMENT_CACHE_DIR')
+    FRAGMENT_CACHE_SIZE = int(os.environ.get('FRAGMENT_CACHE_SIZE') or 16)
+
+    # Per-request query count/DB time as X-DB-Queries, X-DB-Time-Ms and Server-Timing headers
+    QUERY_STATS_HEADERS = os.environ.get('QUERY_STATS_HEADERS', '0') != '0'
+    # Statements slower than this (ms, 0 = off) are logged with their query plan;
+    # the log defaults to instance/slow_queries.log
+    SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS') or 100)
+    SLOW_QUERY_LOG = os.environ.get('SLOW_QUERY_LOG')
+    SLOW_QUERY_LOG_MAX_BYTES = int(os.environ.get('SLOW_QUERY_LOG_MAX_BYTES') or 5 * 1024 * 1024)
+    SLOW_QUERY_LOG_BACKUPS = int(os.environ.get('SLOW_QUERY_LOG_BACKUPS') or 3)
+
+    # Prometheus metrics at /metrics, readable only from these addresses (empty = anyone)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1') != '0'
+    METRICS_ALLOWED_IPS = [ip.strip() for ip in (os.environ.get('METRICS_ALLOWED_IPS') or '127.0.0.1,::1').split(',') if ip.strip()]
+
+    # Request profiling: admins add ?profile=1 (or ?profile=collapsed), and this
+    # fraction of all requests is profiled too. Oldest files go once the
+    # directory (default instance/profiles) outgrows PROFILE_DIR_MAX_BYTES.
+    PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE') or 0)
+    PROFILE_FORMAT = os.environ.get('PROFILE_FORMAT') or 'pstats'
+    PROFILE_DIR = os.environ.get('PROFILE_DIR')
+    PROFILE_DIR_MAX_BYTES = int(os.environ.get('PROFILE_DIR_MAX_BYTES') or 50 * 1024 * 1024)
+
+    # Password hashing. The method string is werkzeug's ("scrypt:N:r:p" or
+    # "pbkdf2:sha256:iterations"); older hashes are upgraded at login.
+    # Hashes run in a pool of PASSWORD_HASH_WORKERS processes per app worker
+    # (0 = in the request thread); the default splits the host's cores between
+    # the WEB_CONCURRENCY app workers (gunicorn's variable). Beyond MAX_PENDING
+    # queued hashes, or after TIMEOUT seconds, login/register answer 503
+    # instead of queueing.
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD') or 'scrypt:32768:8:1'
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS')
+                                or max(1, (os.cpu_count() or 1) // int(os.environ.get('WEB_CONCURRENCY') or 1)))
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING') or PASSWORD_HASH_WORKERS * 4)
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT') or 5)
+
+    # Reverse proxies in front of the app (nginx = 1) whose X-Forwarded-For/-Proto/-Host
+    # are trusted; request.remote_addr is then the real client, which the login
+    # throttle and the /metrics allow-list key on. 0 = connected directly
+    TRUSTED_PROXIES = int(os.environ.get('TRUSTED_PROXIES') or 0)
+
+    # Login throttling: token buckets per client IP and per username, checked
+    # before any password hashing. BURST attempts at once, refilling at
+    # PER_MINUTE. 'memory' keeps buckets per worker; 'sqlite' shares them
+    # between workers through LOGIN_THROTTLE_DB (default instance/login_throttle.db).
+    LOGIN_THROTTLE_ENABLED = os.environ.get('LOGIN_THROTTLE_ENABLED', '1') != '0'
+    LOGIN_THROTTLE_STORE = os.environ.get('LOGIN_THROTTLE_STORE') or 'memory'
+    LOGIN_THROTTLE_DB = os.environ.get('LOGIN_THROTTLE_DB')
+    LOGIN_THROTTLE_MAX_KEYS = int(os.environ.get('LOGIN_THROTTLE_MAX_KEYS') or 100000)
+    LOGIN_IP_BURST = int(os.environ.get('LOGIN_IP_BURST') or 20)
+    LOGIN_IP_PER_MINUTE = float(os.environ.get('LOGIN_IP_PER_MINUTE') or 10)
+    LOGIN_USER_BURST = int(os.environ.get('LOGIN_USER_BURST') or 5)
+    LOGIN_USER_PER_MINUTE = float(os.environ.get('LOGIN_USER_PER_MINUTE') or 2)
+    # Sign-ups per IP; each one costs a password hash
+    REGISTER_IP_BURST = int(os.environ.get('REGISTER_IP_BURST') or 10)
+    REGISTER_IP_PER_MINUTE = float(os.environ.get('REGISTER_IP_PER_MINUTE') or 5)
+
+    # Jinja: compiled templates are cached on disk (TEMPLATE_CACHE_DIR, default
+    # instance/jinja_cache) and all templates are compiled while the app boots
+    TEMPLATE_BYTECODE_CACHE = os.environ.get('TEMPLATE_BYTECODE_CACHE', '1') != '0'
+    TEMPLATE_CACHE_DIR = os.environ.get('TEMPLATE_CACHE_DIR')
+    TEMPLATE_PRECOMPILE = os.environ.get('TEMPLATE_PRECOMPILE', '1') != '0'
+    # Browser cache lifetime for fingerprinted /assets/ files (their URL changes with their content)
+    ASSET_MAX_AGE = int(os.environ.get('ASSET_MAX_AGE') or 365 * 24 * 3600)
+
+    # gzip/deflate for responses of at least COMPRESS_MIN_SIZE bytes; COMPRESS_LEVELS maps
+    # content type -> level (None = compression.DEFAULT_LEVELS, unlisted types are sent as is)
+    COMPRESS_ENABLED = os.environ.get('COMPRESS_ENABLED', '1') != '0'
+    COMPRESS_MIN_SIZE = int(os.environ.get('COMPRESS_MIN_SIZE') or 500)
+    COMPRESS_LEVELS = None
+    # Endpoints whose compressed bodies are cached, keyed by a digest of the body
+    COMPRESS_CACHED_ENDPOINTS = ('routes.view_facility', 'assets')
+    COMPRESS_CACHE_SIZE = int(os.environ.get('COMPRESS_CACHE_SIZE') or 256)
+
+    # Bookings shown per page on /my-bookings
+    MY_BOOKINGS_PAGE_SIZE = int(os.environ.get('MY_BOOKINGS_PAGE_SIZE') or 20)
+
+    # Retries for booking/cancel transactions that hit a concurrent write
+    INVENTORY_RETRY_ATTEMPTS = int(os.environ.get('INVENTORY_RETRY_ATTEMPTS') or 5)
+    INVENTORY_RETRY_BASE_DELAY = float(os.environ.get('INVENTORY_RETRY_BASE_DELAY') or 0.02)
+
+    # SQLite production profile, applied to every new connection. WAL lets
+    # readers run alongside the writer and busy_timeout makes writers wait
+    # for the lock instead of failing with "database is locked".
+    SQLITE_PRAGMAS = {
+        'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE') or 'WAL',
+        'synchronous': os.environ.get('SQLITE_SYNCHRONOUS') or 'NORMAL',
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS') or 5000),
+        'cache_size': int(os.environ.get('SQLITE_CACHE_SIZE') or -64000),  # negative = KiB, so 64 MB
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE') or 268435456),
+        'temp_store': os.environ.get('SQLITE_TEMP_STORE') or 'MEMORY',
+    }
@@ -1,3 +1,244 @@
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from flask import current_app, has_request_context, request, session as flask_session
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.sql import Select
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
 
-db = SQLAlchemy()
+
+
+class RoutingSession(Session):
+    """Session that sends plain reads in GET/HEAD requests to the 'replica' bind.
+
+    Everything else goes to the primary: flushes, INSERT/UPDATE/DELETE,
+    any read in a transaction that has already written, reads outside a
+    request (scripts, CLI) or in a non-GET request (they feed writes), and
+    every read for READ_REPLICA_STICKY_SECONDS after the current user last
+    wrote, so they always see their own changes, and reads inside a
+    use_primary() block. Without a 'replica' bind
+    it behaves exactly like the default session.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self._use_replica(clause):
+            return self._db.engines['replica']
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _use_replica(self, clause):
+        if 'replica' not in self._db.engines:
+            return False
+        if self._flushing or not isinstance(clause, Select):
+            return False
+        if self.info.get('wrote') or self.info.get('use_primary') or self.new or self.dirty or self.deleted:
+            return False
+        if not has_request_context() or request.method not in ('GET', 'HEAD'):
+            return False
+        last_write = flask_session.get('_db_last_write')
+        sticky = current_app.config.get('READ_REPLICA_STICKY_SECONDS', 0)
+        return not (last_write and time.time() - last_write < sticky)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _mark_flush_write(session, flush_context):
+    session.info['wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _mark_statement_write(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info['wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _remember_write(session):
+    if session.info.pop('wrote', False) and has_request_context():
+        # Read-your-writes: keep this user on the primary for a while
+        flask_session['_db_last_write'] = time.time()
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _forget_write(session):
+    session.info.pop('wrote', None)
+
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+
+@contextmanager
+def use_primary():
+    """Send every read inside the block to the primary, e.g. to fill a shared cache"""
+    info = db.session.info
+    info['use_primary'] = info.get('use_primary', 0) + 1
+    try:
+        yield
+    finally:
+        info['use_primary'] -= 1
+
+
+# One row with a random token written when the table is created, so
+# in-process caches can tell a recreated (reseeded, drop_all'ed) database
+# from the one they were filled from even though ids and versions restart
+database_epoch_table = db.Table(
+    "database_epoch",
+    db.Column("id", db.Integer, primary_key=True),
+    db.Column("epoch", db.String(32), nullable=False),
+)
+
+
+@event.listens_for(database_epoch_table, 'after_create')
+def _write_epoch(target, connection, **kw):
+    connection.execute(target.insert().values(id=1, epoch=uuid.uuid4().hex))
+
+
+def database_epoch():
+    """Token that changes whenever the database is recreated; None before the first sync"""
+    return db.session.execute(
+        select(database_epoch_table.c.epoch).where(database_epoch_table.c.id == 1)
+    ).scalar()
+
+
+def insert_ignore(target, rows, index_elements):
+    """INSERT rows, skipping any that collide on index_elements; returns how many went in.
+
+    One ON CONFLICT DO NOTHING statement on SQLite/PostgreSQL, so there is
+    no read-then-insert race. Other databases get one savepoint per row.
+    """
+    if not rows:
+        return 0
+    # Core insert on the table: ORM bulk inserts don't report a rowcount
+    table = getattr(target, '__table__', target)
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(table).on_conflict_do_nothing(index_elements=index_elements)
+        return db.session.execute(stmt, rows).rowcount
+
+    inserted = 0
+    for row in rows:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(table.insert(), row)
+            inserted += 1
+        except IntegrityError:
+            pass
+    return inserted
+
+_PRAGMA_VALUE = re.compile(r"^-?[A-Za-z0-9_]+$")
+
+
+def sqlite_pragma_hook(pragmas):
+    """Build a connect-event listener that sets the given PRAGMAs on each new SQLite connection"""
+    for name, value in pragmas.items():
+        # PRAGMA values can't be bound as parameters, so only accept plain tokens
+        if not _PRAGMA_VALUE.match(str(value)):
+            raise ValueError(f"Invalid value for PRAGMA {name}: {value!r}")
+
+    def on_connect(dbapi_connection, connection_record):
+        if not isinstance(dbapi_connection, sqlite3.Connection):
+            return
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+    return on_connect
+
+
+def active_pragmas(engine, names):
+    """Read back the current value of each PRAGMA from a pooled connection"""
+    with engine.connect() as conn:
+        return {name: conn.exec_driver_sql(f"PRAGMA {name}").scalar() for name in names}
+
+
+def configure_sqlite(app):
+    """Apply SQLITE_PRAGMAS to every SQLite engine of the app and log what is active"""
+    pragmas = app.config.get('SQLITE_PRAGMAS') or {}
+    if not pragmas:
+        return
+    hook = sqlite_pragma_hook(pragmas)
+    with app.app_context():
+        for bind, engine in db.engines.items():
+            if engine.dialect.name != 'sqlite':
+                continue
+            event.listen(engine, 'connect', hook)
+            app.logger.info("SQLite pragmas for %s: %s", bind or 'default', active_pragmas(engine, pragmas))
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._metrics_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except Exception:
+            with self._metrics_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            with self._metrics_lock:
+                self.checkouts += 1
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+
+    def metrics(self):
+        with self._metrics_lock:
+            return {
+                "size": self.size(),
+                "checked_out": self.checkedout(),
+                "checked_in": self.checkedin(),
+                # QueuePool counts unopened base slots as negative overflow
+                "overflow": max(0, self.overflow()),
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_ms_avg": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "wait_ms_max": round(self.wait_max * 1000, 3),
+            }
+
+
+_QUEUE_POOL_OPTIONS = ("pool_size", "max_overflow", "pool_timeout", "pool_recycle")
+
+
+def instrument_pool(app):
+    """Make engines use InstrumentedQueuePool; call before db.init_app.
+
+    In-memory SQLite has to stay on Flask-SQLAlchemy's StaticPool, so the
+    queue-only options are dropped for it instead.
+    """
+    options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        for name in _QUEUE_POOL_OPTIONS:
+            options.pop(name, None)
+    else:
+        options.setdefault('poolclass', InstrumentedQueuePool)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+
+def pool_metrics():
+    """Live pool state per bind; needs an app context"""
+    metrics = {}
+    for bind, engine in db.engines.items():
+        pool = engine.pool
+        metrics[bind or 'default'] = pool.metrics() if isinstance(pool, InstrumentedQueuePool) \
+            else {"pool": type(pool).__name__, "status": pool.status()}
+    return metrics
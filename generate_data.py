@@ -0,0 +1,240 @@
+"""Deterministic synthetic data at production-like volumes.
+
+Usage:
+    python generate_data.py --scale 0.1 [--seed 42] [--reset]
+    python generate_data.py --facilities 1000 --users 50000 --bookings 10000000
+
+Scale 1.0 is 1,000 facilities, 50,000 users and 10,000,000 bookings. Rows
+are built in Python and written with executemany batches inside a few large
+transactions; all users share one precomputed password hash
+("password"). Future bookings are kept within slot capacity and the
+matching slot_inventory rows are written, so the booking pages behave as
+they would in production.
+"""
+import argparse
+import os
+import random
+import time
+from datetime import date, datetime, time as dtime, timedelta
+
+SCALE_1 = {"facilities": 1_000, "users": 50_000, "bookings": 10_000_000}
+SPORTS = [
+    ("Basketball", 10, 90), ("Football", 22, 90), ("Tennis", 4, 60), ("Swimming", 20, 45),
+    ("Volleyball", 12, 60), ("Badminton", 4, 60), ("Squash", 2, 45), ("Padel", 4, 90),
+]
+PASSWORD = "password"
+
+
+def batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def insert_batches(conn, table, rows, batch_size):
+    """executemany `rows` into `table` in chunks; returns the row count"""
+    count = 0
+    for batch in batched(rows, batch_size):
+        conn.execute(table.insert(), batch)
+        count += len(batch)
+    return count
+
+
+def generate(engine, counts, seed, batch_size, history_days=730):
+    from sqlalchemy import column, table
+    from passwords import hash_password
+    import models
+
+    rng = random.Random(seed)
+    today = date.today()
+    horizon_days = 84
+    timings = {}
+
+    def timed(name, fn):
+        started = time.perf_counter()
+        rows = fn()
+        timings[name] = (rows, time.perf_counter() - started)
+
+    with engine.begin() as conn:
+        timed("sport", lambda: insert_batches(conn, models.Sport.__table__, (
+            {"id": i + 1, "name": name, "max_players": players, "default_slot_minutes": minutes}
+            for i, (name, players, minutes) in enumerate(SPORTS)
+        ), batch_size))
+
+        facilities = []
+        for facility_id in range(1, counts["facilities"] + 1):
+            sport_id = rng.randint(1, len(SPORTS))
+            facilities.append({
+                "id": facility_id,
+                "name": f"{SPORTS[sport_id - 1][0]} Facility {facility_id}",
+                "location": f"Building {rng.randint(1, 50)}",
+                "sport_id": sport_id,
+                "price_per_hour": float(rng.choice((10, 15, 20, 25, 30, 40, 50))),
+                "max_capacity": rng.choice((4, 10, 15, 20, 25, 30)),
+                "is_active": rng.random() > 0.05,
+            })
+        timed("facility", lambda: insert_batches(conn, models.Facility.__table__, facilities, batch_size))
+
+        schedules = []
+        for facility in facilities:
+            for day in rng.sample(list(models.DayOfWeek), rng.randint(2, 4)):
+                start_hour = rng.randint(6, 20)
+                schedules.append({
+                    "id": len(schedules) + 1,
+                    "facility_id": facility["id"],
+                    "day_of_week": day,
+                    "start_time": dtime(start_hour),
+                    "end_time": dtime(min(start_hour + 2, 23)),
+                    "seats_available": facility["max_capacity"],
+                })
+        timed("schedule", lambda: insert_batches(conn, models.Schedule.__table__, schedules, batch_size))
+
+        # Hashing is deliberately slow, so do it once for everybody
+        password_hash = hash_password(PASSWORD)
+        timed("user", lambda: insert_batches(conn, models.User.__table__, (
+            {"id": user_id, "username": f"user{user_id:07d}", "password_hash": password_hash,
+             "role": models.Role.USER}
+            for user_id in range(1, counts["users"] + 1)
+        ), batch_size))
+
+    # Bookings: spread over the last `history_days` and the booking horizon.
+    # Every schedule's occurrences are precomputed so each row is a few
+    # random picks rather than date arithmetic.
+    slot_minutes = {i + 1: minutes for i, (_, _, minutes) in enumerate(SPORTS)}
+    facility_by_id = {facility["id"]: facility for facility in facilities}
+    first_day = today - timedelta(days=history_days)
+    days_by_weekday = {}
+    for offset in range(history_days + horizon_days):
+        day = first_day + timedelta(days=offset)
+        days_by_weekday.setdefault(models.DayOfWeek.from_date(day), []).append(day)
+
+    # Datetimes and enums are converted to their stored form once per
+    # occurrence with the dialect's own bind processors, and the rows go
+    # through an untyped table so they aren't converted again per row
+    booking_table = models.Booking.__table__
+    untyped_booking = table(booking_table.name, *(column(c.name) for c in booking_table.columns))
+    to_db = {
+        name: booking_table.c[name].type.dialect_impl(engine.dialect).bind_processor(engine.dialect) or (lambda value: value)
+        for name in ("start", "end", "status")
+    }
+
+    slots = []
+    for schedule in schedules:
+        facility = facility_by_id[schedule["facility_id"]]
+        length = timedelta(minutes=slot_minutes[facility["sport_id"]])
+        occurrences = []
+        for day in days_by_weekday[schedule["day_of_week"]]:
+            start = datetime.combine(day, schedule["start_time"])
+            occurrences.append((day, to_db["start"](start), to_db["end"](start + length)))
+        slots.append((schedule, facility["id"], length / timedelta(hours=1) * facility["price_per_hour"], occurrences))
+
+    booked = {}  # (schedule_id, date) -> seats taken, future occurrences only
+    statuses = tuple(to_db["status"](status) for status in (
+        (models.BookingStatus.CONFIRMED,) * 8 + (models.BookingStatus.PENDING, models.BookingStatus.CANCELLED)
+    ))
+    cancelled = to_db["status"](models.BookingStatus.CANCELLED)
+    seat_choices = (1, 1, 1, 2, 2, 4)
+    users = counts["users"]
+    random_ = rng.random
+
+    def bookings():
+        for _ in range(counts["bookings"]):
+            schedule, facility_id, hourly_price, occurrences = slots[int(random_() * len(slots))]
+            day, start, end = occurrences[int(random_() * len(occurrences))]
+            seats = seat_choices[int(random_() * 6)]
+            status = statuses[int(random_() * 10)]
+            if day >= today and status != cancelled:
+                key = (schedule["id"], day)
+                taken = booked.get(key, 0) + seats
+                if taken > schedule["seats_available"]:
+                    status = cancelled
+                else:
+                    booked[key] = taken
+            yield {
+                "user_id": int(random_() * users) + 1,
+                "facility_id": facility_id,
+                "start": start,
+                "end": end,
+                "seats": seats,
+                "price": hourly_price * seats,
+                "status": status,
+            }
+
+    # Loading into an unindexed table and indexing afterwards is much
+    # faster than maintaining the indexes row by row
+    booking_indexes = list(models.Booking.__table__.indexes)
+    with engine.begin() as conn:
+        for index in booking_indexes:
+            index.drop(conn, checkfirst=True)
+        timed("booking", lambda: insert_batches(conn, untyped_booking, bookings(), batch_size))
+        timed("booking indexes", lambda: [index.create(conn) for index in booking_indexes] and None)
+
+    schedule_by_id = {schedule["id"]: schedule for schedule in schedules}
+    with engine.begin() as conn:
+        timed("slot_inventory", lambda: insert_batches(conn, models.SlotInventory.__table__, (
+            {
+                "facility_id": schedule_by_id[schedule_id]["facility_id"],
+                "schedule_id": schedule_id,
+                "slot_date": day,
+                "capacity": schedule_by_id[schedule_id]["seats_available"],
+                "remaining": schedule_by_id[schedule_id]["seats_available"] - seats,
+            }
+            for (schedule_id, day), seats in booked.items()
+        ), batch_size))
+
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=0.01, help="multiplier on 1k facilities/50k users/10M bookings")
+    parser.add_argument("--facilities", type=int)
+    parser.add_argument("--users", type=int)
+    parser.add_argument("--bookings", type=int)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    parser.add_argument("--database-url", help="defaults to DATABASE_URL / Config")
+    parser.add_argument("--reset", action="store_true", help="drop and recreate all tables first")
+    args = parser.parse_args()
+
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+
+    counts = {name: max(1, int(base * args.scale)) for name, base in SCALE_1.items()}
+    for name in counts:
+        if getattr(args, name) is not None:
+            counts[name] = getattr(args, name)
+
+    from main import create_app
+    from database import db
+    from schema import sync_schema
+
+    app = create_app()
+    with app.app_context():
+        if args.reset:
+            db.drop_all()
+            sync_schema()
+        elif db.session.query(db.func.count()).select_from(db.metadata.tables["user"]).scalar():
+            parser.error("database already has data; pass --reset to replace it")
+
+        print(f"Generating {counts} with seed {args.seed}")
+        started = time.perf_counter()
+        timings = generate(db.engine, counts, args.seed, args.batch_size)
+        total = time.perf_counter() - started
+
+    for step, (rows, seconds) in timings.items():
+        if rows is None:
+            print(f"  {step:<15} {'':>16} {seconds:7.2f}s")
+        else:
+            rate = rows / seconds if seconds else 0
+            print(f"  {step:<15} {rows:>11,} rows in {seconds:7.2f}s ({rate:,.0f} rows/s)")
+    print(f"Done in {total:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+import random
+import threading
+import time
+from datetime import date
+from flask import current_app
+from sqlalchemy import update, select, case, func
+from sqlalchemy.exc import OperationalError
+from database import db, insert_ignore
+from models import Schedule, SlotInventory, DayOfWeek, Booking, BookingStatus
+
+
+def slot_capacity(schedule):
+    """Seats a fresh occurrence of this schedule starts with"""
+    if schedule.seats_available is not None:
+        return schedule.seats_available
+    return schedule.facility.max_capacity or 0
+
+
+def _insert_missing(rows):
+    """Insert inventory rows, leaving rows that already exist untouched"""
+    insert_ignore(SlotInventory, rows, ["schedule_id", "slot_date"])
+
+
+def ensure_slots(schedule, slot_dates):
+    """Lazily create inventory rows for the given dates of one schedule"""
+    capacity = slot_capacity(schedule)
+    _insert_missing([
+        {
+            "facility_id": schedule.facility_id,
+            "schedule_id": schedule.id,
+            "slot_date": slot_date,
+            "capacity": capacity,
+            "remaining": capacity,
+        }
+        for slot_date in slot_dates
+    ])
+
+
+def backfill_from_bookings():
+    """One-time migration for a database that predates slot_inventory.
+
+    The old booking code took seats straight off Schedule.seats_available
+    and gave them back on cancel, so that column is each schedule's
+    capacity minus every active booking, past or future. Put those seats
+    back, then record the future bookings as inventory rows so their seats
+    can't be sold again.
+    """
+    schedules = {
+        (schedule.facility_id, schedule.day_of_week, schedule.start_time): schedule
+        for schedule in Schedule.query
+    }
+    booked_by_schedule = {}
+    booked_by_slot = {}
+    today = date.today()
+    rows = db.session.execute(
+        select(Booking.facility_id, Booking.start, func.sum(func.coalesce(Booking.seats, 1)))
+        .where(Booking.status != BookingStatus.CANCELLED)
+        .group_by(Booking.facility_id, Booking.start)
+    )
+    for facility_id, start, seats in rows:
+        schedule = schedules.get((facility_id, DayOfWeek.from_date(start), start.time()))
+        if schedule is None:
+            continue
+        booked_by_schedule[schedule] = booked_by_schedule.get(schedule, 0) + seats
+        if start.date() >= today:
+            booked_by_slot[(schedule, start.date())] = seats
+
+    for schedule, seats in booked_by_schedule.items():
+        if schedule.seats_available is not None:
+            schedule.seats_available += seats
+    _insert_missing([
+        {
+            "facility_id": schedule.facility_id,
+            "schedule_id": schedule.id,
+            "slot_date": slot_date,
+            "capacity": slot_capacity(schedule),
+            "remaining": max(slot_capacity(schedule) - seats, 0),
+        }
+        for (schedule, slot_date), seats in booked_by_slot.items()
+    ])
+    db.session.commit()
+    return len(booked_by_schedule), len(booked_by_slot)
+
+
+def remaining_seats(schedule, slot_date):
+    """Seats left for one occurrence (full capacity if it was never booked)"""
+    remaining = db.session.execute(
+        select(SlotInventory.remaining).where(
+            SlotInventory.schedule_id == schedule.id,
+            SlotInventory.slot_date == slot_date,
+        )
+    ).scalar()
+    return slot_capacity(schedule) if remaining is None else remaining
+
+
+def remaining_by_slot(facility_id, start_date, end_date):
+    """Map (schedule_id, slot_date) -> seats left for a facility over a date range"""
+    rows = db.session.execute(
+        select(SlotInventory.schedule_id, SlotInventory.slot_date, SlotInventory.remaining).where(
+            SlotInventory.facility_id == facility_id,
+            SlotInventory.slot_date >= start_date,
+            SlotInventory.slot_date <= end_date,
+        )
+    )
+    return {(schedule_id, slot_date): remaining for schedule_id, slot_date, remaining in rows}
+
+
+def reserve_seats(schedule, slot_date, seats):
+    """Atomically take seats from one occurrence.
+
+    Returns False when fewer than `seats` are left. Runs as a single
+    conditional UPDATE so concurrent workers can't oversell the slot.
+    """
+    ensure_slots(schedule, [slot_date])
+    result = db.session.execute(
+        update(SlotInventory)
+        .where(
+            SlotInventory.schedule_id == schedule.id,
+            SlotInventory.slot_date == slot_date,
+            SlotInventory.remaining >= seats,
+        )
+        .values(remaining=SlotInventory.remaining - seats)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+def release_seats(schedule, slot_date, seats):
+    """Atomically give seats back to one occurrence, never above its capacity"""
+    restored = SlotInventory.remaining + seats
+    result = db.session.execute(
+        update(SlotInventory)
+        .where(
+            SlotInventory.schedule_id == schedule.id,
+            SlotInventory.slot_date == slot_date,
+        )
+        .values(
+            remaining=case(
+                (restored > SlotInventory.capacity, SlotInventory.capacity),
+                else_=restored,
+            ),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+
+# Per-facility write contention counters, read through contention_stats()
+_contention = {}
+_contention_lock = threading.Lock()
+
+
+def _record(facility_id, kind):
+    with _contention_lock:
+        stats = _contention.setdefault(facility_id, {'conflicts': 0, 'retries': 0, 'exhausted': 0})
+        stats[kind] += 1
+
+
+def contention_stats():
+    """Snapshot of {facility_id: {'conflicts', 'retries', 'exhausted'}}"""
+    with _contention_lock:
+        return {facility_id: dict(stats) for facility_id, stats in _contention.items()}
+
+
+def is_write_conflict(error):
+    """True for errors that mean another worker holds the write lock (SQLite's 'database is locked')"""
+    return isinstance(error, OperationalError) and 'locked' in str(error.orig).lower()
+
+
+def with_retry(facility_id, attempt):
+    """Run attempt() in its own transaction, retrying on write conflicts.
+
+    attempt must do all of its reads and writes itself, since the session is
+    rolled back between tries. Backoff is exponential with full jitter and
+    bounded by INVENTORY_RETRY_ATTEMPTS.
+    """
+    attempts = current_app.config['INVENTORY_RETRY_ATTEMPTS']
+    base_delay = current_app.config['INVENTORY_RETRY_BASE_DELAY']
+    for attempt_no in range(attempts):
+        try:
+            return attempt()
+        except OperationalError as error:
+            db.session.rollback()
+            if not is_write_conflict(error):
+                raise
+            _record(facility_id, 'conflicts')
+            if attempt_no == attempts - 1:
+                _record(facility_id, 'exhausted')
+                raise
+            _record(facility_id, 'retries')
+            time.sleep(random.uniform(0, base_delay * 2 ** attempt_no))
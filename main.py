@@ -1,25 +1,108 @@
-
+import click
 from flask import Flask, render_template ,session, redirect, url_for
-from database import db
+from werkzeug.middleware.proxy_fix import ProxyFix
+from database import db, configure_sqlite, instrument_pool
 from config import Config
-import models
-from routes import routes
-
-app = Flask(__name__)
-app.config.from_object(Config)
-db.init_app(app)
 
-app.register_blueprint(routes)
 
-with app.app_context():
-    db.create_all()
-
-@app.route("/")
 def home():
     if 'user_id' not in session:
         return redirect(url_for('routes.login'))
     return render_template("index.html")
 
 
+def create_app(config=Config):
+    # Models and routes are imported here so importing this module stays cheap
+    import models  # noqa: F401 (registers the tables)
+    from routes import routes
+    from schema import sync_schema, sync_schema_if_changed
+    from replica import replica_paths, copy_database, sync_forever
+    from querylog import init_query_log
+    from metrics import init_metrics
+    from profiler import init_profiler
+    from throttle import init_login_throttle
+    from availability import init_availability_cache
+    from catalog import init_catalog_cache
+    from templating import configure_templates, precompile_templates
+    from assets import init_assets
+    from compression import init_compression
+
+    app = Flask(__name__)
+    app.config.from_object(config)
+    if app.config.get('TRUSTED_PROXIES'):
+        hops = app.config['TRUSTED_PROXIES']
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops, x_host=hops)
+    instrument_pool(app)
+    db.init_app(app)
+    configure_sqlite(app)
+    init_query_log(app)
+    init_metrics(app)
+    init_profiler(app)
+    init_login_throttle(app)
+    init_availability_cache(app)
+    init_catalog_cache(app)
+    configure_templates(app)
+    init_assets(app)
+    init_compression(app)
+
+    app.register_blueprint(routes)
+    app.add_url_rule("/", "home", home)
+
+    @app.cli.command("init-db")
+    def init_db():
+        """Create or update tables, columns and indexes."""
+        sync_schema()
+        print("Database schema is up to date.")
+
+    @app.cli.command("precompile-templates")
+    def precompile():
+        """Compile every template into the bytecode cache."""
+        if app.jinja_env.cache is not None:
+            app.jinja_env.cache.clear()  # boot already loaded them; time a real compile
+        for name, ms in precompile_templates(app).items():
+            print(f"{name:<28} {ms:7.1f} ms")
+
+    @app.cli.command("import-users")
+    @click.argument("csv_path", type=click.Path(exists=True, dir_okay=False))
+    @click.option("--batch-size", default=2000, show_default=True)
+    @click.option("--workers", type=int, help="hashing processes (default: CPU count)")
+    def import_users(csv_path, batch_size, workers):
+        """Create members from a CSV with username,password[,role] columns."""
+        from users import import_users_csv
+        counts = import_users_csv(csv_path, batch_size=batch_size, workers=workers)
+        print(f"Imported {counts['inserted']:,} users; {counts['skipped']:,} already existed, "
+              f"{counts['invalid']:,} invalid rows.")
+
+    @app.cli.command("sync-replica")
+    @click.option("--once", is_flag=True, help="copy once and exit")
+    def sync_replica(once):
+        """Keep a local SQLite replica in sync; run one per host, next to the workers."""
+        paths = replica_paths(app)
+        if not paths:
+            raise click.ClickException("No file-backed SQLite primary and replica configured.")
+        copy_database(*paths)
+        interval = app.config['REPLICA_SYNC_INTERVAL']
+        if once or interval <= 0:
+            return
+        print(f"Copying {paths[0]} to {paths[1]} every {interval:g}s")
+        sync_forever(paths, interval)
+
+    @app.cli.command("seed-db")
+    def seed_db():
+        """Drop everything and load the demo data."""
+        from seed_data import seed_database
+        seed_database()
+
+    with app.app_context():
+        if app.config['SCHEMA_SYNC'] == 'always':
+            sync_schema()
+        elif app.config['SCHEMA_SYNC'] == 'check':
+            sync_schema_if_changed()
+    return app
+
+
 if __name__ == "__main__":
+    from replica import start_replica_sync
+    app = create_app()
+    start_replica_sync(app)
     app.run(debug=True)
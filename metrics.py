@@ -0,0 +1,200 @@
+import itertools
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from flask import Response, abort, request
+
+# Request latency buckets in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Shard:
+    """Per-thread holder; when its thread exits it is collected and its
+    counts are folded into the registry's base totals"""
+    __slots__ = ("counters", "histograms", "__weakref__")
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+
+
+class Registry:
+    """Counters and histograms sharded per thread.
+
+    Each thread only ever writes to its own shard, so recording is a couple
+    of dict operations with no lock; the lock is taken once per thread (to
+    register its shard), when a thread exits (to fold its shard into the
+    base totals) and on every scrape, which sums the base and the live
+    shards. Totals never go backwards, and thread-per-request servers don't
+    pile up shards.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = {}  # shard number -> (counters, histograms) of a live thread
+        self._base = ({}, {})
+        self._next_shard = itertools.count()
+        # Reentrant: a finalizer may fold a shard in while this thread holds it
+        self._lock = threading.RLock()
+        self._meta = {}  # name -> (type, help, buckets)
+
+    def counter(self, name, help):
+        self._meta[name] = ("counter", help, None)
+
+    def histogram(self, name, help, buckets=LATENCY_BUCKETS):
+        self._meta[name] = ("histogram", help, tuple(buckets))
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            number = next(self._next_shard)
+            with self._lock:
+                # The registry keeps the dicts, not the holder, so the holder
+                # dies with its thread's locals
+                self._shards[number] = (shard.counters, shard.histograms)
+            weakref.finalize(shard, self._retire, number)
+        return shard
+
+    def _retire(self, number):
+        with self._lock:
+            counters, histograms = self._shards.pop(number)
+            _merge(self._base, counters, histograms)
+
+    def inc(self, name, labels=(), amount=1):
+        counters = self._shard().counters
+        key = (name, labels)
+        counters[key] = counters.get(key, 0) + amount
+
+    def observe(self, name, value, labels=()):
+        histograms = self._shard().histograms
+        key = (name, labels)
+        entry = histograms.get(key)
+        if entry is None:
+            buckets = self._meta[name][2]
+            # Per-bucket counts (the last one is +Inf), then sum
+            entry = histograms[key] = [[0] * (len(buckets) + 1), 0.0]
+        entry[0][bisect_left(self._meta[name][2], value)] += 1
+        entry[1] += value
+
+    def snapshot(self):
+        """Totals over all threads: ({(name, labels): value}, {(name, labels): (counts, sum)})"""
+        totals = ({}, {})
+        with self._lock:
+            _merge(totals, *self._base)
+            shards = list(self._shards.values())
+        for counters, histograms in shards:
+            _merge(totals, counters, histograms)
+        return totals
+
+    def render(self):
+        """Everything in the Prometheus text exposition format"""
+        counters, histograms = self.snapshot()
+        lines = []
+        for name, (kind, help, buckets) in self._meta.items():
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == "counter":
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append(f"{name}{_labels(labels)} {_number(value)}")
+                continue
+            for (metric, labels), (counts, total) in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(buckets + ("+Inf",), counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', str(bound)),))} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {_number(total)}")
+                lines.append(f"{name}_count{_labels(labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+def _merge(into, counters, histograms):
+    into_counters, into_histograms = into
+    for key, value in list(counters.items()):
+        into_counters[key] = into_counters.get(key, 0) + value
+    for key, (counts, total) in list(histograms.items()):
+        merged = into_histograms.setdefault(key, [[0] * len(counts), 0.0])
+        merged[0] = [a + b for a, b in zip(merged[0], counts)]
+        merged[1] += total
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+registry = Registry()
+registry.counter("settle_http_requests_total", "HTTP requests by endpoint, method and status.")
+registry.histogram("settle_http_request_duration_seconds", "HTTP request latency by endpoint, method and status.")
+registry.counter("settle_bookings_total", "Booking attempts by outcome (success, capacity, overlap, failure).")
+registry.counter("settle_cancellations_total", "Cancellation requests by outcome.")
+registry.counter("settle_login_attempts_total", "Login attempts by throttle outcome (allowed, throttled_ip, throttled_username).")
+
+
+def booking_outcome(outcome):
+    registry.inc("settle_bookings_total", (("outcome", outcome),))
+
+
+def cancellation_outcome(outcome):
+    registry.inc("settle_cancellations_total", (("outcome", outcome),))
+
+
+def login_attempt(outcome):
+    registry.inc("settle_login_attempts_total", (("outcome", outcome),))
+
+
+def record_request(endpoint, method, status, seconds):
+    labels = (("endpoint", endpoint), ("method", method), ("status", status))
+    registry.inc("settle_http_requests_total", labels)
+    registry.observe("settle_http_request_duration_seconds", seconds, labels)
+
+
+def init_metrics(app):
+    """Time every request and serve the registry at /metrics.
+
+    Only addresses in METRICS_ALLOWED_IPS may scrape it; anyone else gets a
+    404. Requests that match no route are recorded under endpoint
+    "unmatched" so random paths can't blow up the label set.
+    """
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+    allowed = set(app.config.get('METRICS_ALLOWED_IPS') or ())
+
+    # The start time rides in the WSGI environ rather than flask.g: every
+    # access through a context-local proxy costs about as much as the
+    # recording itself
+    wsgi_app = app.wsgi_app
+
+    def timed_wsgi_app(environ, start_response):
+        environ['settle.request_started'] = time.perf_counter()
+        return wsgi_app(environ, start_response)
+
+    app.wsgi_app = timed_wsgi_app
+
+    @app.after_request
+    def record(response):
+        req = request._get_current_object()
+        started = req.environ.get('settle.request_started')
+        if started is not None:
+            record_request(req.endpoint or "unmatched", req.method,
+                           str(response.status_code), time.perf_counter() - started)
+        return response
+
+    @app.route("/metrics")
+    def metrics():
+        if allowed and request.remote_addr not in allowed:
+            abort(404)
+        return Response(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -1,6 +1,6 @@
 from database import db
 import enum
-from werkzeug.security import generate_password_hash, check_password_hash
+import passwords
 class BookingStatus(enum.Enum):
     PENDING = "pending"
     CONFIRMED = "confirmed"
@@ -17,11 +17,15 @@ class User(db.Model):
     role= db.Column(db.Enum(Role), default=Role.USER)  # e.g., user, admin
     def set_password(self, password):
         """Hash and store the password"""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = passwords.hash_password(password)
     
     def check_password(self, password):
         """Check if provided password matches the stored hash"""
-        return check_password_hash(self.password_hash, password)
+        return passwords.verify_password(self.password_hash, password)
+
+    def password_outdated(self):
+        """True when the stored hash uses other parameters than PASSWORD_HASH_METHOD"""
+        return passwords.needs_rehash(self.password_hash)
 
     def __repr__(self):
         return f'<User {self.username}>'
@@ -45,8 +49,17 @@ class DayOfWeek(enum.Enum):
     FRIDAY = 5
     SATURDAY = 6
 
+    @classmethod
+    def from_date(cls, value):
+        """Map a date to our enum (Python weekday has Monday=0, ours has Sunday=0)"""
+        return cls((value.weekday() + 1) % 7)
+
 class Schedule(db.Model):
-    
+    # Matches the cancel_booking lookup by (facility, day, start time)
+    __table_args__ = (
+        db.Index("ix_schedule_facility_day_start", "facility_id", "day_of_week", "start_time"),
+    )
+
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     facility_id = db.Column(db.Integer, db.ForeignKey("facility.id"), nullable=False)
     day_of_week = db.Column(db.Enum(DayOfWeek), nullable=False)  # Which day
@@ -75,6 +88,25 @@ class Schedule(db.Model):
         return day_names[self.day_of_week]
 
 
+class SlotInventory(db.Model):
+    """Seats left for one dated occurrence of a weekly schedule"""
+    __tablename__ = "slot_inventory"
+    __table_args__ = (
+        db.UniqueConstraint("schedule_id", "slot_date"),
+        db.Index("ix_slot_inventory_facility_date", "facility_id", "slot_date"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    facility_id = db.Column(db.Integer, db.ForeignKey("facility.id"), nullable=False)
+    schedule_id = db.Column(db.Integer, db.ForeignKey("schedule.id"), nullable=False)
+    slot_date = db.Column(db.Date, nullable=False)
+    capacity = db.Column(db.Integer, nullable=False)
+    remaining = db.Column(db.Integer, nullable=False)
+
+    def __repr__(self):
+        return f'<SlotInventory schedule={self.schedule_id} {self.slot_date} {self.remaining}/{self.capacity}>'
+
+
 class Facility(db.Model):
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     name = db.Column(db.String(120), nullable=False)
@@ -85,11 +117,28 @@ class Facility(db.Model):
     is_active = db.Column(db.Boolean, default=True)
     schedules = db.relationship("Schedule", backref="facility", lazy=True)
     sport = db.relationship("Sport", backref="facilities")
+
+    # Partial index: the catalog only ever lists active facilities
+    __table_args__ = (
+        db.Index(
+            "ix_facility_active", "id",
+            sqlite_where=db.text("is_active = 1"),
+            postgresql_where=db.text("is_active"),
+        ),
+    )
+
     def __repr__(self):
         return f'<Facility {self.name}>'
 
 
 class Booking(db.Model):
+    # The first serves the overlap check and the keyset-paginated history,
+    # the second the per-status stats on /my-bookings
+    __table_args__ = (
+        db.Index("ix_booking_user_start_end", "user_id", "start", "end", "status"),
+        db.Index("ix_booking_user_status", "user_id", "status", "price"),
+    )
+
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     facility_id = db.Column(db.Integer, db.ForeignKey('facility.id'), nullable=False)
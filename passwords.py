@@ -0,0 +1,122 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from flask import current_app, has_app_context
+from werkzeug.security import generate_password_hash, check_password_hash
+
+DEFAULT_METHOD = "scrypt:32768:8:1"
+
+
+class HashingBusy(RuntimeError):
+    """The hashing pool is full or didn't answer in time; the caller should retry later"""
+
+
+_executor = None
+_executor_pid = None
+_slots = None
+_lock = threading.Lock()
+_stats = {'submitted': 0, 'rejected': 0, 'timeouts': 0}
+_canonical = {}
+
+
+def _setting(name, default):
+    return current_app.config.get(name, default) if has_app_context() else default
+
+
+def hash_method():
+    return _setting('PASSWORD_HASH_METHOD', DEFAULT_METHOD)
+
+
+def _method_prefix(method):
+    return generate_password_hash("", method).split("$", 1)[0]
+
+
+def canonical_method(method):
+    """The method string werkzeug actually writes for `method` ("scrypt" -> "scrypt:32768:8:1").
+
+    Finding out takes one full hash, so it runs in the pool like any other
+    (and may raise HashingBusy); the answer is kept for the process.
+    """
+    canonical = _canonical.get(method)
+    if canonical is None:
+        canonical = _canonical.setdefault(method, _run(_method_prefix, method))
+    return canonical
+
+
+def needs_rehash(stored_hash, method=None):
+    """True when stored_hash was made with different parameters than the configured ones"""
+    return stored_hash.split("$", 1)[0] != canonical_method(method or hash_method())
+
+
+def _get_executor():
+    """The process pool for this worker, created on first use (and again after a fork)"""
+    global _executor, _executor_pid, _slots
+    workers = _setting('PASSWORD_HASH_WORKERS', 0)
+    if not workers:
+        return None
+    with _lock:
+        if _executor is None or _executor_pid != os.getpid():
+            # spawn rather than fork: the app process has threads and open connections
+            _executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _executor_pid = os.getpid()
+            _slots = threading.BoundedSemaphore(_setting('PASSWORD_HASH_MAX_PENDING', workers * 4))
+        return _executor
+
+
+def _run(fn, *args):
+    """Run fn in the pool, or inline when the pool is disabled.
+
+    Raises HashingBusy instead of queueing when PASSWORD_HASH_MAX_PENDING
+    hashes are already waiting, or when one takes longer than
+    PASSWORD_HASH_TIMEOUT, so a login burst can't pile up without bound.
+    """
+    executor = _get_executor()
+    if executor is None:
+        return fn(*args)
+    slots = _slots
+    if not slots.acquire(blocking=False):
+        with _lock:
+            _stats['rejected'] += 1
+        raise HashingBusy("Too many password checks in progress")
+    try:
+        future = executor.submit(fn, *args)
+    except BaseException:
+        slots.release()
+        raise
+    # The slot is only freed once the hash is really done: a timed-out hash
+    # keeps a worker busy, so it must keep counting against the limit
+    future.add_done_callback(lambda _: slots.release())
+    with _lock:
+        _stats['submitted'] += 1
+    try:
+        return future.result(timeout=_setting('PASSWORD_HASH_TIMEOUT', 5))
+    except FutureTimeout:
+        future.cancel()
+        with _lock:
+            _stats['timeouts'] += 1
+        raise HashingBusy("Password check timed out")
+
+
+def hash_password(password):
+    return _run(generate_password_hash, password, hash_method())
+
+
+def verify_password(stored_hash, password):
+    return _run(check_password_hash, stored_hash, password)
+
+
+def pool_stats():
+    with _lock:
+        stats = dict(_stats)
+    stats['workers'] = _setting('PASSWORD_HASH_WORKERS', 0)
+    stats['method'] = hash_method()
+    return stats
+
+
+def shutdown():
+    global _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
@@ -0,0 +1,143 @@
+import cProfile
+import os
+import pstats
+import random
+import re
+import time
+from flask import g, request, session
+
+FORMATS = ("pstats", "collapsed")
+_EXTENSIONS = {"pstats": ".prof", "collapsed": ".collapsed"}
+_UNSAFE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def profile_dir(app):
+    return app.config.get('PROFILE_DIR') or os.path.join(app.instance_path, 'profiles')
+
+
+def collapsed_stacks(profiler):
+    """Turn cProfile's caller/callee graph into collapsed stacks ("a;b;c <microseconds>").
+
+    cProfile only keeps one level of callers, so a function's time is split
+    across its call paths in proportion to each caller's share of its
+    cumulative time. Good enough to feed a flame graph.
+    """
+    stats = pstats.Stats(profiler).stats
+    children = {}
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, (_, _, _, cumulative) in callers.items():
+            children.setdefault(caller, []).append((func, cumulative))
+
+    def label(func):
+        filename, line, name = func
+        return f"{name} ({os.path.basename(filename)}:{line})" if line else name
+
+    lines = {}
+
+    def walk(func, seconds, path):
+        _, _, own, cumulative, _ = stats[func]
+        share = seconds / cumulative if cumulative else 0
+        stack = path + (label(func),)
+        key = ";".join(stack)
+        lines[key] = lines.get(key, 0) + own * share
+        for child, child_seconds in children.get(func, ()):
+            # Skip recursion (already counted further up) and sub-microsecond branches
+            if child_seconds * share >= 1e-6 and label(child) not in stack:
+                walk(child, child_seconds * share, stack)
+
+    for func, (_, _, _, cumulative, callers) in stats.items():
+        if not callers:
+            walk(func, cumulative, ())
+    return "".join(f"{stack} {round(seconds * 1e6)}\n" for stack, seconds in lines.items() if seconds >= 0.5e-6)
+
+
+def rotate(directory, max_bytes):
+    """Delete the oldest profiles until the directory fits in max_bytes"""
+    files = []
+    for entry in os.scandir(directory):
+        if entry.is_file():
+            stat = entry.stat()
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+    files.sort()
+    total = sum(size for _, size, _ in files)
+    for _, size, path in files:
+        if total <= max_bytes:
+            break
+        os.remove(path)
+        total -= size
+
+
+def list_profiles(directory):
+    """Saved profiles, newest first"""
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for entry in os.scandir(directory):
+        if entry.is_file() and entry.name.endswith(tuple(_EXTENSIONS.values())):
+            stat = entry.stat()
+            profiles.append({"name": entry.name, "size": stat.st_size, "modified": stat.st_mtime})
+    return sorted(profiles, key=lambda profile: profile["modified"], reverse=True)
+
+
+def _requested_format(app):
+    """Format for this request, or None when it shouldn't be profiled"""
+    sample_rate = app.config.get('PROFILE_SAMPLE_RATE') or 0
+    if sample_rate and random.random() < sample_rate:
+        return app.config.get('PROFILE_FORMAT', 'pstats')
+    asked = request.args.get('profile') or request.headers.get('X-Profile')
+    if not asked or asked == '0' or not session.get('is_admin'):
+        return None
+    return asked if asked in FORMATS else app.config.get('PROFILE_FORMAT', 'pstats')
+
+
+def init_profiler(app):
+    """Run selected requests under cProfile and save the result to PROFILE_DIR.
+
+    Admins get a profile by adding ?profile=1 (or X-Profile: 1); the value
+    may also name the format, "pstats" or "collapsed". PROFILE_SAMPLE_RATE
+    additionally profiles that fraction of all requests. The response
+    names the saved file in its X-Profile header.
+    """
+    directory = profile_dir(app)
+    max_bytes = app.config.get('PROFILE_DIR_MAX_BYTES', 50 * 1024 * 1024)
+
+    @app.before_request
+    def start_profile():
+        profile_format = _requested_format(app)
+        if profile_format is None:
+            return
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already running in this interpreter
+            return
+        g.profile = (profiler, profile_format, time.perf_counter())
+
+    @app.after_request
+    def save_profile(response):
+        if 'profile' not in g:
+            return response
+        profiler, profile_format, started = g.pop('profile')
+        profiler.disable()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        name = _UNSAFE.sub("_", f"{time.strftime('%Y%m%d-%H%M%S')}-{int(time.time() * 1000) % 1000:03d}"
+                                f"-{request.method}-{request.endpoint or 'unmatched'}-{elapsed_ms:.0f}ms")
+        name += _EXTENSIONS[profile_format]
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, name)
+        if profile_format == "collapsed":
+            with open(path, "w") as f:
+                f.write(collapsed_stacks(profiler))
+        else:
+            profiler.dump_stats(path)
+        rotate(directory, max_bytes)
+        response.headers['X-Profile'] = name
+        return response
+
+    @app.teardown_request
+    def stop_profile(error=None):
+        # after_request is skipped when the request errors out in debug mode
+        profile = g.pop('profile', None)
+        if profile is not None:
+            profile[0].disable()
@@ -0,0 +1,108 @@
+import logging
+import os
+import time
+from logging.handlers import RotatingFileHandler
+from flask import g, has_app_context, has_request_context, request
+from sqlalchemy import event
+from database import db
+
+slow_logger = logging.getLogger('settle.slow_queries')
+
+_EXPLAINABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH')
+
+
+def params_shape(parameters, executemany=False):
+    """Describe bound parameters by type only, so values never reach the log"""
+    if executemany:
+        rows = list(parameters or ())
+        return f"{len(rows)} x {params_shape(rows[0]) if rows else '()'}"
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{name}: {type(value).__name__}" for name, value in parameters.items()) + "}"
+    return "(" + ", ".join(type(value).__name__ for value in parameters or ()) + ")"
+
+
+def explain(conn, statement, parameters, executemany=False):
+    """Query plan for a statement, run on the same DBAPI connection that executed it"""
+    if not statement.lstrip().upper().startswith(_EXPLAINABLE):
+        return None
+    dialect = conn.dialect.name
+    if dialect == 'sqlite':
+        prefix = "EXPLAIN QUERY PLAN "
+    elif dialect == 'postgresql':
+        prefix = "EXPLAIN "
+    else:
+        return None
+    if executemany:
+        parameters = parameters[0] if parameters else ()
+    # A raw cursor doesn't fire the engine events, so this isn't timed or logged itself
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        return "\n".join(str(row[-1]) for row in cursor.fetchall())
+    except Exception as error:
+        return f"unavailable: {error}"
+    finally:
+        cursor.close()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info['query_started'] = time.perf_counter()
+
+
+def _after_cursor_execute(threshold_ms):
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info['query_started']) * 1000
+        if has_app_context() and 'db_queries' in g:
+            g.db_queries += 1
+            g.db_time_ms += elapsed_ms
+        if threshold_ms and elapsed_ms >= threshold_ms:
+            route = f"{request.method} {request.endpoint or request.path}" if has_request_context() else "-"
+            slow_logger.warning(
+                "%.1f ms route=%s params=%s\n%s\nplan:\n%s\n",
+                elapsed_ms, route, params_shape(parameters, executemany), statement.strip(),
+                explain(conn, statement, parameters, executemany) or "-",
+            )
+    return after_cursor_execute
+
+
+def init_query_log(app):
+    """Count queries and DB time per request, and log slow statements to a rotating file.
+
+    With QUERY_STATS_HEADERS on, every response carries X-DB-Queries,
+    X-DB-Time-Ms and a Server-Timing entry. Statements slower than
+    SLOW_QUERY_MS (0 turns it off) go to SLOW_QUERY_LOG with their route,
+    parameter types and query plan.
+    """
+    threshold_ms = app.config.get('SLOW_QUERY_MS') or 0
+    if threshold_ms and not slow_logger.handlers:
+        path = app.config.get('SLOW_QUERY_LOG') or os.path.join(app.instance_path, 'slow_queries.log')
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        handler = RotatingFileHandler(
+            path,
+            maxBytes=app.config.get('SLOW_QUERY_LOG_MAX_BYTES', 5 * 1024 * 1024),
+            backupCount=app.config.get('SLOW_QUERY_LOG_BACKUPS', 3),
+        )
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        slow_logger.addHandler(handler)
+        slow_logger.setLevel(logging.WARNING)
+        slow_logger.propagate = False
+
+    after_cursor_execute = _after_cursor_execute(threshold_ms)
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+
+    @app.before_request
+    def start_query_stats():
+        g.db_queries = 0
+        g.db_time_ms = 0.0
+
+    if app.config.get('QUERY_STATS_HEADERS'):
+        @app.after_request
+        def add_query_stats_headers(response):
+            if 'db_queries' in g:
+                response.headers['X-DB-Queries'] = str(g.db_queries)
+                response.headers['X-DB-Time-Ms'] = f"{g.db_time_ms:.2f}"
+                response.headers.add('Server-Timing', f"db;desc=\"{g.db_queries} queries\";dur={g.db_time_ms:.2f}")
+            return response
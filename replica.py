@@ -0,0 +1,67 @@
+import logging
+import sqlite3
+import threading
+import time
+from database import db
+
+logger = logging.getLogger(__name__)
+
+
+def _sqlite_paths():
+    """(primary, replica) file paths when both binds are file-backed SQLite, else None"""
+    if 'replica' not in db.engines:
+        return None
+    primary, replica = db.engines[None].url, db.engines['replica'].url
+    if primary.get_backend_name() != 'sqlite' or replica.get_backend_name() != 'sqlite':
+        return None
+    if not primary.database or not replica.database or ':memory:' in (primary.database, replica.database):
+        return None
+    return primary.database, replica.database
+
+
+def copy_database(primary_path, replica_path):
+    """Copy a consistent snapshot of the primary into the replica with SQLite's backup API"""
+    source = sqlite3.connect(primary_path, timeout=30)
+    target = sqlite3.connect(replica_path, timeout=30)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+
+
+def replica_paths(app):
+    with app.app_context():
+        return _sqlite_paths()
+
+
+def sync_forever(paths, interval):
+    """Copy the primary into the replica every `interval` seconds"""
+    while True:
+        time.sleep(interval)
+        try:
+            copy_database(*paths)
+        except sqlite3.Error:
+            logger.exception("Replica sync failed")
+
+
+def start_replica_sync(app):
+    """Seed the local SQLite replica now and keep refreshing it every REPLICA_SYNC_INTERVAL seconds.
+
+    A stand-in for real replication when developing against SQLite; with a
+    real replica (or a non-SQLite bind) this does nothing. Only for a
+    single-process server (`python main.py`): with several workers, run
+    `flask --app main sync-replica` once per host instead, so there is a
+    single writer to the replica file.
+    """
+    paths = replica_paths(app)
+    if not paths:
+        return None
+
+    copy_database(*paths)
+    interval = app.config['REPLICA_SYNC_INTERVAL']
+    if interval <= 0:
+        return None
+    thread = threading.Thread(target=sync_forever, args=(paths, interval), name="replica-sync", daemon=True)
+    thread.start()
+    return thread
@@ -1,11 +1,37 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
-from database import db
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify, current_app, send_from_directory
+from database import db, pool_metrics
 import models
+import inventory
+import availability
+import catalog
+import bookings
+import metrics
+import compression
+import profiler
+import passwords
+import throttle
+import users
 from models import Sport
 from datetime import datetime, timedelta, date
+from functools import wraps
+from markupsafe import Markup
+import math
+from sqlalchemy import update
+from sqlalchemy.orm import joinedload
 
 routes = Blueprint('routes', __name__)
 
+def admin_required(view):
+    """Restrict a JSON endpoint to logged-in admins"""
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        if 'user_id' not in session:
+            return jsonify({"error": "Not authenticated"}), 401
+        if not session.get('is_admin'):
+            return jsonify({"error": "Unauthorized"}), 403
+        return view(*args, **kwargs)
+    return wrapped
+
 @routes.route("/register", methods=["GET", "POST"])
 def register():
     if request.method == "GET":
@@ -19,20 +45,35 @@ def register():
         flash("Username and password are required.", "error")
         return render_template("register.html")
     
-    existing_user = models.User.query.filter_by(username=username).first()
-    if existing_user:
+    # Every sign-up costs a password hash, so it goes through the throttle too
+    sign_up_throttle = throttle.get_throttle()
+    if sign_up_throttle:
+        retry_after = sign_up_throttle.check_registration(request.remote_addr)
+        if retry_after is not None:
+            flash("Too many sign-ups from your address. Please wait a moment and try again.", "error")
+            return render_template("register.html"), 429, {"Retry-After": str(math.ceil(retry_after))}
+    
+    if users.username_taken(username):
         flash("Username already exists.", "error")
         return render_template("register.html")
-
+    
     try:
-        new_user = models.User(username=username)
-        new_user.set_password(password)        
-        db.session.add(new_user)
+        password_hash = passwords.hash_password(password)
+        # One INSERT ... ON CONFLICT DO NOTHING: a concurrent sign-up for the same
+        # name since the check above just finds it taken instead of tripping the
+        # unique constraint
+        if not users.create_user(username, password_hash):
+            db.session.rollback()
+            flash("Username already exists.", "error")
+            return render_template("register.html")
         db.session.commit()
         
         flash("Registration successful! Please login.", "success")
         return redirect(url_for('routes.login'))
     
+    except passwords.HashingBusy:
+        flash("We're busy right now, please try again in a moment.", "error")
+        return render_template("register.html"), 503
     except Exception as e:
         db.session.rollback()
         flash("Registration failed. Please try again.", "error")
@@ -51,9 +92,34 @@ def login():
         flash("Username and password are required.", "error")
         return render_template("login.html")
 
+    # Throttled attempts are turned away before the user lookup and password hash
+    login_throttle = throttle.get_throttle()
+    if login_throttle:
+        rejected = login_throttle.check(request.remote_addr, username)
+        metrics.login_attempt(rejected[0] if rejected else "allowed")
+        if rejected:
+            flash("Too many login attempts. Please wait a moment and try again.", "error")
+            return render_template("login.html"), 429, {"Retry-After": str(math.ceil(rejected[1]))}
+
     user = models.User.query.filter_by(username=username).first()
     
-    if user and user.check_password(password):
+    try:
+        valid = user is not None and user.check_password(password)
+    except passwords.HashingBusy:
+        flash("We're busy right now, please try again in a moment.", "error")
+        return render_template("login.html"), 503
+    
+    if valid:
+        # Upgrade hashes made with older PASSWORD_HASH_METHOD settings while we have the password;
+        # if the pool is busy, the next login will do it
+        try:
+            if user.password_outdated():
+                user.set_password(password)
+                db.session.commit()
+        except passwords.HashingBusy:
+            pass
+    
+    if valid:
         session['user_id'] = user.id
         session['username'] = user.username
         flash(f"Welcome back, {user.username}!", "success")
@@ -76,12 +142,15 @@ def logout():
 
 @routes.route("/view-facilities")
 def view_facility():
-    sports = models.Sport.query.all()
-    facilities = models.Facility.query.filter_by(is_active=True).all()
+    # The cards are the same for everyone, so they're rendered once per catalog version
+    version = catalog.current_version()
     
-    return render_template("view_facilities.html", 
-                         sports=sports, 
-                         facilities=facilities)
+    def catalog_context():
+        snapshot = catalog.get_catalog(version)
+        return {"sports": snapshot.sports, "facilities": snapshot.facilities}
+    
+    catalog_html = catalog.cached_fragment("_facility_catalog.html", version, catalog_context)
+    return render_template("view_facilities.html", catalog_html=Markup(catalog_html))
 
 @routes.route("/booking/<int:facility_id>", methods=["GET", "POST"])
 def booking(facility_id):
@@ -89,34 +158,19 @@ def booking(facility_id):
         flash("Please login to make a booking.", "error")
         return redirect(url_for('routes.login'))
     
-    facility = models.Facility.query.get_or_404(facility_id)
+    facility = models.Facility.query.options(
+        joinedload(models.Facility.sport)
+    ).filter_by(id=facility_id).first_or_404()
     
     if request.method == "GET":
-        # Get next 7 days and their available schedules
-        upcoming_dates = []
-        for i in range(7):
-            booking_date = date.today() + timedelta(days=i)
-            # Convert Python weekday (Monday=0) to our enum (Sunday=0, Monday=1, etc.)
-            day_of_week = (booking_date.weekday() + 1) % 7
-            
-            # Get available schedules for this day and facility
-            available_schedules = models.Schedule.query.filter(
-                models.Schedule.facility_id == facility_id,
-                models.Schedule.day_of_week == models.DayOfWeek(day_of_week)
-            ).all()
-            
-            # Only add dates that have scheduled slots
-            if available_schedules:
-                upcoming_dates.append({
-                    'date': booking_date,
-                    'date_str': booking_date.strftime('%Y-%m-%d'),
-                    'display_date': booking_date.strftime('%A, %B %d, %Y'),
-                    'day_name': booking_date.strftime('%A'),
-                    'schedules': available_schedules
-                })
+        # Show the first few days up front; the page fetches later dates from the API
+        page_days = current_app.config['BOOKING_PAGE_DAYS']
+        upcoming_dates = availability.get_availability(facility, date.today(), page_days)
         
         # Get user's recent bookings
-        user_bookings = models.Booking.query.filter_by(
+        user_bookings = models.Booking.query.options(
+            joinedload(models.Booking.facility)
+        ).filter_by(
             user_id=session['user_id']
         ).order_by(models.Booking.start.desc()).limit(5).all()
         
@@ -125,9 +179,9 @@ def booking(facility_id):
                              upcoming_dates=upcoming_dates,
                              user_bookings=user_bookings,
                              today=date.today().strftime('%Y-%m-%d'),
-                             # Add datetime functions to template context
-                             datetime=datetime,
-                             timedelta=timedelta)
+                             next_date=(date.today() + timedelta(days=page_days)).strftime('%Y-%m-%d'),
+                             horizon_days=current_app.config['BOOKING_HORIZON_DAYS'],
+                             page_days=page_days)
     
     # Handle POST request - Work with schedule selection
     try:
@@ -152,70 +206,119 @@ def booking(facility_id):
             return redirect(url_for('routes.booking', facility_id=facility_id))
         
         booking_date = datetime.strptime(booking_date_str, '%Y-%m-%d').date()
+        if seats < 1 or models.DayOfWeek.from_date(booking_date) != schedule.day_of_week:
+            raise ValueError("date does not match schedule")
+        
+        horizon_days = current_app.config['BOOKING_HORIZON_DAYS']
+        if not date.today() <= booking_date < date.today() + timedelta(days=horizon_days):
+            flash(f"Bookings open up to {horizon_days} days ahead.", "error")
+            return redirect(url_for('routes.booking', facility_id=facility_id))
         
         # Calculate start and end times based on schedule
         start_datetime = datetime.combine(booking_date, schedule.start_time)
         slot_minutes = facility.sport.default_slot_minutes
         end_datetime = start_datetime + timedelta(minutes=slot_minutes)
         
-        # Validate capacity
-        if seats > schedule.seats_available:
-            flash(f"Maximum capacity is {schedule.seats_available} people.", "error")
-            return redirect(url_for('routes.booking', facility_id=facility_id))
-        
-        # Check for overlapping bookings
-        existing_booking = models.Booking.query.filter(
-            models.Booking.user_id == session['user_id'],
-            models.Booking.start < end_datetime,
-            models.Booking.end > start_datetime,
-            models.Booking.status != models.BookingStatus.CANCELLED
-        ).first()
-        
-        if existing_booking:
-            flash("This time slot is already booked.", "error")
-            return redirect(url_for('routes.booking', facility_id=facility_id))
-        
         # Calculate price
         duration_hours = slot_minutes / 60
         total_price = duration_hours * facility.price_per_hour * seats
-        schedule.seats_available -= seats  # Update available seats
-        # Create booking
-        booking = models.Booking(
-            user_id=session['user_id'],
-            facility_id=facility_id,
-            start=start_datetime,
-            end=end_datetime,
-            seats=seats,
-            price=total_price,
-            status=models.BookingStatus.PENDING 
-        )
         
-        db.session.add(booking)
-        db.session.commit()
+        def place_booking():
+            # Check for overlapping bookings
+            if bookings.find_conflicts(session['user_id'], [(start_datetime, end_datetime)]):
+                return "overlap"
+            
+            # Take the seats from this date's inventory in one conditional UPDATE
+            if not inventory.reserve_seats(schedule, booking_date, seats):
+                db.session.rollback()
+                return "full"
+            availability.invalidate_facility(facility_id)
+            
+            # Create booking
+            db.session.add(models.Booking(
+                user_id=session['user_id'],
+                facility_id=facility_id,
+                start=start_datetime,
+                end=end_datetime,
+                seats=seats,
+                price=total_price,
+                status=models.BookingStatus.PENDING 
+            ))
+            db.session.commit()
+            return "booked"
+        
+        # Retried with backoff if another worker wrote the same rows meanwhile
+        outcome = inventory.with_retry(facility_id, place_booking)
+        metrics.booking_outcome({"booked": "success", "full": "capacity"}.get(outcome, outcome))
+        
+        if outcome == "overlap":
+            flash("This time slot is already booked.", "error")
+            return redirect(url_for('routes.booking', facility_id=facility_id))
+        if outcome == "full":
+            seats_left = inventory.remaining_seats(schedule, booking_date)
+            flash(f"Only {seats_left} seats left for this slot.", "error")
+            return redirect(url_for('routes.booking', facility_id=facility_id))
         
         flash(f"Booking confirmed for {facility.name} on {booking_date.strftime('%A, %B %d')} from {schedule.start_time.strftime('%H:%M')} to {end_datetime.strftime('%H:%M')}!", "success")
         return redirect(url_for('routes.my_bookings'))
         
     except ValueError as e:
+        metrics.booking_outcome("failure")
         flash("Invalid date or schedule selection.", "error")
         return redirect(url_for('routes.booking', facility_id=facility_id))
     except Exception as e:
+        metrics.booking_outcome("failure")
         db.session.rollback()
         flash(f"Booking failed: {str(e)}", "error")
         return redirect(url_for('routes.booking', facility_id=facility_id))
 
+@routes.route("/api/facilities/<int:facility_id>/availability")
+def facility_availability(facility_id):
+    facility = models.Facility.query.options(
+        joinedload(models.Facility.sport)
+    ).filter_by(id=facility_id).first_or_404()
+    
+    today = date.today()
+    horizon_end = today + timedelta(days=current_app.config['BOOKING_HORIZON_DAYS'] - 1)
+    try:
+        from_date = datetime.strptime(request.args['from'], '%Y-%m-%d').date() if 'from' in request.args else today
+        to_date = (datetime.strptime(request.args['to'], '%Y-%m-%d').date() if 'to' in request.args
+                   else from_date + timedelta(days=current_app.config['BOOKING_PAGE_DAYS'] - 1))
+    except ValueError:
+        return jsonify({"error": "Dates must be in YYYY-MM-DD format"}), 400
+    
+    # Clamp to the bookable window
+    from_date = max(from_date, today)
+    to_date = min(to_date, horizon_end)
+    if from_date > to_date:
+        upcoming_dates = []
+    else:
+        upcoming_dates = availability.get_availability(facility, from_date, (to_date - from_date).days + 1)
+    
+    return jsonify({
+        "facility_id": facility.id,
+        "from": from_date.strftime('%Y-%m-%d'),
+        "to": to_date.strftime('%Y-%m-%d'),
+        "horizon_end": horizon_end.strftime('%Y-%m-%d'),
+        "dates": availability.availability_to_json(upcoming_dates)
+    })
+
 @routes.route("/my-bookings")
 def my_bookings():
     if 'user_id' not in session:
         flash("Please login to view bookings.", "error")
         return redirect(url_for('routes.login'))
     
-    user_bookings = models.Booking.query.filter_by(
-        user_id=session['user_id']
-    ).order_by(models.Booking.start.desc()).all()
+    cursor = request.args.get('before')
+    user_bookings, next_cursor = bookings.bookings_page(
+        session['user_id'], cursor, current_app.config['MY_BOOKINGS_PAGE_SIZE']
+    )
     
     return render_template("my_bookings.html", 
                          bookings=user_bookings,
+                         stats=bookings.booking_stats(session['user_id']),
+                         next_cursor=next_cursor,
+                         is_first_page=not cursor,
                          today=date.today())
 
 @routes.route("/cancel-booking/<int:booking_id>", methods=["POST"])
@@ -229,26 +332,98 @@ def cancel_booking(booking_id):
         return jsonify({"error": "Unauthorized"}), 403
     
     if booking.start < datetime.now():
+        metrics.cancellation_outcome("too_late")
         return jsonify({"error": "Cannot cancel past bookings"}), 400
     
-    booking.status = models.BookingStatus.CANCELLED
-    Facility = models.Facility.query.get(booking.facility_id)
     # Find the corresponding schedule
-    booking_weekday = (booking.start.weekday() + 1) % 7
-
-
     schedule = models.Schedule.query.filter(
         models.Schedule.facility_id == booking.facility_id,
         models.Schedule.start_time == booking.start.time(),
-        models.Schedule.day_of_week == models.DayOfWeek(booking_weekday)
+        models.Schedule.day_of_week == models.DayOfWeek.from_date(booking.start)
     ).first()
-    if schedule:
-        schedule.seats_available += booking.seats  # Restore available seats
-    db.session.commit()
+    facility_id, slot_date, seats = booking.facility_id, booking.start.date(), booking.seats
+    
+    def cancel():
+        # Only the request that actually flips the status gives the seats back
+        flipped = db.session.execute(
+            update(models.Booking)
+            .where(models.Booking.id == booking_id,
+                   models.Booking.status != models.BookingStatus.CANCELLED)
+            .values(status=models.BookingStatus.CANCELLED)
+        ).rowcount
+        if not flipped:
+            db.session.rollback()
+            return False
+        if schedule:
+            inventory.release_seats(schedule, slot_date, seats)  # Restore available seats
+            availability.invalidate_facility(facility_id)
+        db.session.commit()
+        return True
     
+    if not inventory.with_retry(facility_id, cancel):
+        metrics.cancellation_outcome("already_cancelled")
+        return jsonify({"error": "Booking is already cancelled"}), 400
+    
+    metrics.cancellation_outcome("cancelled")
     return jsonify({"message": "Booking cancelled successfully"})
 
 
+@routes.route("/api/admin/contention")
+@admin_required
+def inventory_contention():
+    # Write conflicts, retries and exhausted retries per facility since this worker started
+    return jsonify({str(facility_id): stats for facility_id, stats in inventory.contention_stats().items()})
+
+
+@routes.route("/api/admin/pool")
+@admin_required
+def pool_status():
+    # Connection pool state per database bind, to tell pool starvation from slow queries
+    return jsonify(pool_metrics())
+
+
+@routes.route("/api/admin/password-hashing")
+@admin_required
+def password_hashing_status():
+    # Hash method, pool size and how many checks were rejected or timed out
+    return jsonify(passwords.pool_stats())
+
+
+@routes.route("/api/admin/login-throttle")
+@admin_required
+def login_throttle_status():
+    login_throttle = throttle.get_throttle()
+    return jsonify(login_throttle.stats() if login_throttle else {"enabled": False})
+
+
+@routes.route("/api/admin/caches")
+@admin_required
+def cache_status():
+    # Hit/miss counts and sizes of this worker's in-process caches
+    return jsonify({"availability": availability.cache_stats(), "fragments": catalog.fragment_stats()})
+
+
+@routes.route("/api/admin/compression")
+@admin_required
+def compression_status():
+    # Responses compressed, bytes before/after and the compressed-body cache
+    compressor = compression.get_compressor()
+    return jsonify(compressor.stats() if compressor else {"enabled": False})
+
+
+@routes.route("/api/admin/profiles")
+@admin_required
+def list_profiles():
+    # Profiles saved by ?profile=1 or sampling, newest first
+    return jsonify(profiler.list_profiles(profiler.profile_dir(current_app)))
+
+
+@routes.route("/api/admin/profiles/<path:name>")
+@admin_required
+def download_profile(name):
+    return send_from_directory(profiler.profile_dir(current_app), name, as_attachment=True)
+
+
 @routes.route("/process-payment/<int:booking_id>", methods=["POST"])
 def payment_success(booking_id  ):
     booking = models.Booking.query.get_or_404(booking_id)
@@ -0,0 +1,123 @@
+import hashlib
+import logging
+from sqlalchemy import inspect, select, delete, insert
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.schema import CreateTable, CreateIndex
+from database import db
+
+logger = logging.getLogger(__name__)
+
+# Fingerprint of the models the database was last synced against, so
+# workers can skip reflection and DDL when nothing changed
+schema_version = db.Table(
+    "schema_version",
+    db.Column("fingerprint", db.String(64), nullable=False),
+)
+
+
+def ensure_columns():
+    """Add columns declared on the models that existing tables are missing.
+
+    Only columns that are nullable or carry a server default can be added
+    this way, which is how new columns should be declared anyway.
+    """
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    added = []
+    with db.engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                if not column.nullable and column.server_default is None:
+                    raise RuntimeError(f"Cannot add NOT NULL column {table.name}.{column.name} without a server default")
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(db.engine.dialect)}"
+                if column.server_default is not None:
+                    ddl += f" NOT NULL DEFAULT {column.server_default.arg}" if not column.nullable \
+                        else f" DEFAULT {column.server_default.arg}"
+                conn.exec_driver_sql(ddl)
+                added.append(f"{table.name}.{column.name}")
+    if added:
+        logger.info("Added missing columns: %s", ", ".join(added))
+    return added
+
+
+def ensure_indexes():
+    """Create any index declared on the models that the database is missing.
+
+    create_all only adds indexes together with new tables, so databases
+    created before an index was declared never get it otherwise.
+    """
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    created = []
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(bind=db.engine)
+                created.append(index.name)
+    if created:
+        logger.info("Created missing indexes: %s", ", ".join(created))
+    return created
+
+
+def ensure_schema():
+    """Bring an existing database up to the models: missing columns, then indexes"""
+    ensure_columns()
+    ensure_indexes()
+
+
+def schema_fingerprint():
+    """Hash of the DDL the models compile to on the current engine"""
+    dialect = db.engine.dialect
+    digest = hashlib.sha256()
+    for table in db.metadata.sorted_tables:
+        digest.update(str(CreateTable(table).compile(dialect=dialect)).encode())
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            digest.update(str(CreateIndex(index).compile(dialect=dialect)).encode())
+    return digest.hexdigest()
+
+
+def stored_fingerprint():
+    try:
+        with db.engine.connect() as conn:
+            return conn.execute(select(schema_version.c.fingerprint)).scalar()
+    except (OperationalError, ProgrammingError):
+        return None
+
+
+def sync_schema():
+    """Create missing tables, columns and indexes, then record the fingerprint.
+
+    A database from before slot_inventory existed gets its booked seats
+    moved into the new table the first time it is synced.
+    """
+    from inventory import backfill_from_bookings
+    from models import SlotInventory
+    inspector = inspect(db.engine)
+    upgrading = inspector.has_table("booking") and not inspector.has_table(SlotInventory.__tablename__)
+    db.create_all()
+    ensure_schema()
+    if upgrading:
+        schedules, slots = backfill_from_bookings()
+        logger.info("Backfilled slot inventory: %d schedules restored, %d booked slots", schedules, slots)
+    with db.engine.begin() as conn:
+        conn.execute(delete(schema_version))
+        conn.execute(insert(schema_version).values(fingerprint=schema_fingerprint()))
+
+
+def sync_schema_if_changed():
+    """Run sync_schema only when the stored fingerprint doesn't match the models.
+
+    The common case costs one small query instead of reflecting every table.
+    """
+    if stored_fingerprint() == schema_fingerprint():
+        return False
+    sync_schema()
+    return True
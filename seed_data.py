@@ -206,6 +206,7 @@ def seed_database():
         print(f"- {schedule.facility.name}: {schedule.get_day_name()} {schedule.start_time.strftime('%H:%M')}-{schedule.end_time.strftime('%H:%M')} ({schedule.seats_available} seats)")
 
 if __name__ == "__main__":
-    from main import app
+    from main import create_app
+    app = create_app()
     with app.app_context():
         seed_database()
\ No newline at end of file
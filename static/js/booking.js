@@ -0,0 +1,131 @@
+let selectedDate = null;
+let selectedScheduleId = null;
+
+function toggleScheduleSlots(dateStr) {
+    // Close other open slots
+    document.querySelectorAll('.schedule-slots').forEach(slots => {
+        if (slots.id !== `slots-${dateStr}`) {
+            slots.classList.remove('show');
+        }
+    });
+
+    document.querySelectorAll('.date-header').forEach(header => {
+        header.classList.remove('selected');
+    });
+
+    document.querySelectorAll('.date-card').forEach(card => {
+        card.classList.remove('selected');
+    });
+
+    document.querySelectorAll('.chevron').forEach(chevron => {
+        chevron.classList.remove('rotated');
+    });
+
+    // Toggle current slots
+    const slotsDiv = document.getElementById(`slots-${dateStr}`);
+    const dateCard = document.querySelector(`[data-date="${dateStr}"]`);
+    const dateHeader = dateCard.querySelector('.date-header');
+    const chevron = dateHeader.querySelector('.chevron');
+
+    if (slotsDiv.classList.contains('show')) {
+        slotsDiv.classList.remove('show');
+        dateHeader.classList.remove('selected');
+        dateCard.classList.remove('selected');
+        chevron.classList.remove('rotated');
+    } else {
+        slotsDiv.classList.add('show');
+        dateHeader.classList.add('selected');
+        dateCard.classList.add('selected');
+        chevron.classList.add('rotated');
+    }
+}
+
+function selectSlot(card) {
+    // Remove previous selections
+    document.querySelectorAll('.slot-card').forEach(c => c.classList.remove('selected'));
+
+    // Select current card
+    card.classList.add('selected');
+    const radioInput = card.querySelector('input[type="radio"]');
+    radioInput.checked = true;
+
+    // Parse the value (date|schedule_id)
+    const [date, scheduleId] = radioInput.value.split('|');
+
+    // Update hidden fields
+    document.getElementById('booking_date').value = date;
+    document.getElementById('schedule_id').value = scheduleId;
+
+    // Enable submit button
+    document.getElementById('submitBtn').disabled = false;
+
+    selectedDate = date;
+    selectedScheduleId = scheduleId;
+}
+
+function renderDateCard(dateInfo) {
+    const slots = dateInfo.slots.map(slot => `
+        <label class="slot-card" data-date="${dateInfo.date}" data-schedule="${slot.schedule_id}">
+            <input type="radio" name="schedule_slot" value="${dateInfo.date}|${slot.schedule_id}" required>
+            <div class="slot-time">${slot.start} - ${slot.end}</div>
+            <div class="slot-duration">${slot.minutes} minutes session</div>
+            <div class="slot-price">$${slot.price.toFixed(2)}</div>
+            <div class="seats_available ">${slot.seats_left} seats-available</div>
+        </label>`).join('');
+    return `
+        <div class="date-card has-slots" data-date="${dateInfo.date}">
+            <div class="date-header" onclick="toggleScheduleSlots('${dateInfo.date}')">
+                <div><strong>${dateInfo.display_date}</strong></div>
+                <div style="display: flex; align-items: center; gap: 0.5rem;">
+                    <span class="available-count">${dateInfo.slots.length} slot(s)</span>
+                    <span class="chevron">▼</span>
+                </div>
+            </div>
+            <div class="schedule-slots" id="slots-${dateInfo.date}">
+                <div class="slots-grid">${slots}</div>
+            </div>
+        </div>`;
+}
+
+async function loadMoreDates(button) {
+    // Fetch the next page of days from the availability API
+    const from = new Date(button.dataset.next + 'T00:00:00');
+    const to = new Date(from);
+    to.setDate(to.getDate() + Number(button.dataset.pageDays) - 1);
+    const iso = d => `${d.getFullYear()}-${String(d.getMonth() + 1).padStart(2, '0')}-${String(d.getDate()).padStart(2, '0')}`;
+
+    button.disabled = true;
+    try {
+        const response = await fetch(`${button.dataset.url}?from=${button.dataset.next}&to=${iso(to)}`);
+        const data = await response.json();
+        const dateList = document.getElementById('dateList');
+        dateList.querySelector('.no-schedule')?.remove();
+        dateList.insertAdjacentHTML('beforeend', data.dates.map(renderDateCard).join(''));
+
+        if (data.to >= data.horizon_end) {
+            button.remove();
+        } else {
+            const next = new Date(data.to + 'T00:00:00');
+            next.setDate(next.getDate() + 1);
+            button.dataset.next = iso(next);
+            button.disabled = false;
+        }
+    } catch (error) {
+        button.disabled = false;
+    }
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+    // Handle slot selection (delegated so cards loaded later work too)
+    document.getElementById('dateList').addEventListener('click', function(event) {
+        const card = event.target.closest('.slot-card');
+        if (card) {
+            selectSlot(card);
+        }
+    });
+
+    const loadMoreBtn = document.getElementById('loadMoreBtn');
+    if (loadMoreBtn) {
+        loadMoreBtn.addEventListener('click', () => loadMoreDates(loadMoreBtn));
+    }
+});
@@ -0,0 +1,138 @@
+function cancelBooking(bookingId) {
+    if (confirm('Are you sure you want to cancel this booking? This action cannot be undone.')) {
+        fetch('/cancel-booking/' + bookingId, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            }
+        })
+        .then(response => response.json())
+        .then(data => {
+            if (data.error) {
+                alert('Error: ' + data.error);
+            } else {
+                alert('Booking cancelled successfully');
+                updateStatistics(bookingId, 'cancelled');
+                updateBookingCard(bookingId, 'cancelled');
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            alert('An error occurred while cancelling the booking');
+        });
+    }
+}
+
+function processPayment(bookingId) {
+    if (confirm('Proceed with payment for this booking?')) {
+        fetch('/process-payment/' + bookingId, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            }
+        })
+        .then(response => response.json())
+        .then(data => {
+            if (data.error) {
+                alert('Error: ' + data.error);
+            } else {
+                alert('Payment successful! Your booking is now confirmed.');
+                updateStatistics(bookingId, 'confirmed');
+                updateBookingCard(bookingId, 'confirmed');
+            }
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            alert('An error occurred while processing payment');
+        });
+    }
+}
+
+function findBookingCard(bookingId) {
+    return document.querySelector(`.booking-card[data-booking-id="${bookingId}"]`);
+}
+
+function updateBookingCard(bookingId, newStatus) {
+    const targetCard = findBookingCard(bookingId);
+    if (!targetCard) return;
+
+    // Update the card's visual appearance
+    targetCard.className = `booking-card ${newStatus}`;
+
+    // Update the status badge
+    const statusBadge = targetCard.querySelector('.status-badge');
+    if (statusBadge) {
+        statusBadge.className = `status-badge status-${newStatus}`;
+        statusBadge.textContent = newStatus.toUpperCase();
+    }
+
+    // Update the actions section
+    const actionsDiv = targetCard.querySelector('.booking-actions');
+    if (actionsDiv) {
+        if (newStatus === 'confirmed') {
+            // Remove payment button, keep cancel and rebook buttons
+            const paymentBtn = actionsDiv.querySelector('.payment-btn');
+            if (paymentBtn) {
+                paymentBtn.remove();
+            }
+        } else if (newStatus === 'cancelled') {
+            // Remove payment and cancel buttons, keep only rebook button
+            const paymentBtn = actionsDiv.querySelector('.payment-btn');
+            const cancelBtn = actionsDiv.querySelector('.cancel-btn');
+            if (paymentBtn) paymentBtn.remove();
+            if (cancelBtn) cancelBtn.remove();
+
+            // Update card opacity for cancelled bookings
+            targetCard.style.opacity = '0.7';
+        }
+    }
+
+    // Add a subtle animation to indicate the change
+    targetCard.style.transform = 'scale(1.02)';
+    targetCard.style.transition = 'all 0.3s ease';
+    setTimeout(() => {
+        targetCard.style.transform = 'scale(1)';
+    }, 300);
+}
+
+function updateStatistics(bookingId, newStatus) {
+    // The tiles cover the whole booking history, not just this page, so
+    // apply the one booking that changed instead of recounting the cards
+    const card = findBookingCard(bookingId);
+    if (!card) return;
+    const oldStatus = card.dataset.status;
+    const price = parseFloat(card.dataset.price) || 0;
+    const changes = {confirmed: 0, pending: 0, spent: 0};
+
+    if (oldStatus === 'confirmed' || oldStatus === 'pending') {
+        changes[oldStatus] -= 1;
+    }
+    if (oldStatus === 'confirmed') {
+        changes.spent -= price;
+    }
+    if (newStatus === 'confirmed') {
+        changes.confirmed += 1;
+        changes.spent += price;
+    }
+    card.dataset.status = newStatus;
+
+    // Update the statistics cards
+    const statCards = document.querySelectorAll('.stat-card');
+    statCards.forEach(statCard => {
+        const stat = statCard.dataset.stat;
+        if (!changes[stat]) return;
+        const value = (parseFloat(statCard.dataset.value) || 0) + changes[stat];
+        statCard.dataset.value = value;
+        statCard.querySelector('.stat-number').textContent =
+            stat === 'spent' ? '$' + value.toFixed(2) : value;
+    });
+
+    // Add animation to statistics
+    statCards.forEach(card => {
+        card.style.transform = 'scale(1.05)';
+        card.style.transition = 'transform 0.2s ease';
+        setTimeout(() => {
+            card.style.transform = 'scale(1)';
+        }, 200);
+    });
+}
@@ -0,0 +1,25 @@
+// Sport filter functionality
+document.addEventListener('DOMContentLoaded', function() {
+    const sportFilters = document.querySelectorAll('.sport-filter');
+    const facilityCards = document.querySelectorAll('.facility-card');
+
+    sportFilters.forEach(filter => {
+        filter.addEventListener('click', function() {
+            // Remove active class from all filters
+            sportFilters.forEach(f => f.classList.remove('active'));
+            // Add active class to clicked filter
+            this.classList.add('active');
+
+            const selectedSport = this.getAttribute('data-sport');
+
+            // Show/hide facility cards based on sport
+            facilityCards.forEach(card => {
+                if (selectedSport === 'all' || card.getAttribute('data-sport-id') === selectedSport) {
+                    card.style.display = 'block';
+                } else {
+                    card.style.display = 'none';
+                }
+            });
+        });
+    });
+});
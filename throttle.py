@@ -0,0 +1,165 @@
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+
+
+class MemoryBucketStore:
+    """Token buckets for one worker process.
+
+    Buckets live in an OrderedDict kept in last-touched order. Idle ones
+    are dropped from the front once they have had time to refill completely
+    (a full bucket is the same as no bucket), and the least recently used
+    go first when max_keys is reached.
+    """
+
+    def __init__(self, max_keys=100_000, clock=time.monotonic):
+        self.max_keys = max_keys
+        self._clock = clock
+        self._buckets = OrderedDict()  # key -> (tokens, updated, ttl)
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, per_second):
+        """Take one token; returns (allowed, seconds until the next token)"""
+        now = self._clock()
+        with self._lock:
+            self._evict(now)
+            tokens, updated, _ = self._buckets.pop(key, (capacity, now, 0))
+            tokens, allowed, retry_after = _spend(tokens, updated, now, capacity, per_second)
+            self._buckets[key] = (tokens, now, capacity / per_second)
+            return allowed, retry_after
+
+    def _evict(self, now):
+        # Caller holds the lock
+        while self._buckets:
+            _, (_, updated, ttl) = next(iter(self._buckets.items()))
+            if updated + ttl > now and len(self._buckets) < self.max_keys:
+                break
+            self._buckets.popitem(last=False)
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class SQLiteBucketStore:
+    """Token buckets in a small SQLite file, shared by every worker on the host"""
+
+    def __init__(self, path, clock=time.time):
+        self.path = path
+        self._clock = clock
+        self._local = threading.local()
+        self._takes = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS login_bucket "
+                "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, expires REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_login_bucket_expires ON login_bucket (expires)")
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def take(self, key, capacity, per_second):
+        now = self._clock()
+        conn = self._connect()
+        # BEGIN IMMEDIATE takes the write lock up front, so two workers can't
+        # both read the same last token
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated FROM login_bucket WHERE key = ?", (key,)).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            tokens, allowed, retry_after = _spend(tokens, updated, now, capacity, per_second)
+            conn.execute(
+                "INSERT INTO login_bucket (key, tokens, updated, expires) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated, "
+                "expires = excluded.expires",
+                (key, tokens, now, now + capacity / per_second),
+            )
+            self._takes += 1
+            if self._takes % 1000 == 0:
+                conn.execute("DELETE FROM login_bucket WHERE expires < ?", (now,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return allowed, retry_after
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM login_bucket").fetchone()[0]
+
+
+def _spend(tokens, updated, now, capacity, per_second):
+    """Refill a bucket up to now and take one token: (tokens left, allowed, retry_after)"""
+    tokens = min(capacity, tokens + (now - updated) * per_second)
+    if tokens >= 1:
+        return tokens - 1, True, 0.0
+    return tokens, False, (1 - tokens) / per_second
+
+
+class LoginThrottle:
+    """Per-IP and per-username token buckets for login attempts, and per-IP ones for sign-ups"""
+
+    def __init__(self, store, ip_burst, ip_per_minute, user_burst, user_per_minute,
+                 register_burst=10, register_per_minute=5):
+        self.store = store
+        self.ip_limit = (ip_burst, ip_per_minute / 60)
+        self.user_limit = (user_burst, user_per_minute / 60)
+        self.register_limit = (register_burst, register_per_minute / 60)
+        self._lock = threading.Lock()
+        self.counters = {'allowed': 0, 'throttled_ip': 0, 'throttled_username': 0,
+                         'register_allowed': 0, 'throttled_register': 0}
+
+    def check(self, ip, username):
+        """None if this attempt may go ahead, otherwise (scope, seconds to wait)"""
+        allowed, retry_after = self.store.take(f"ip:{ip}", *self.ip_limit)
+        if allowed:
+            allowed, retry_after = self.store.take(f"user:{username.strip().lower()}", *self.user_limit)
+            outcome = 'allowed' if allowed else 'throttled_username'
+        else:
+            outcome = 'throttled_ip'
+        with self._lock:
+            self.counters[outcome] += 1
+        return None if allowed else (outcome, retry_after)
+
+    def check_registration(self, ip):
+        """None if this sign-up may go ahead, otherwise seconds to wait"""
+        allowed, retry_after = self.store.take(f"register:{ip}", *self.register_limit)
+        with self._lock:
+            self.counters['register_allowed' if allowed else 'throttled_register'] += 1
+        return None if allowed else retry_after
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+        stats['store'] = type(self.store).__name__
+        stats['tracked_keys'] = len(self.store)
+        return stats
+
+
+def init_login_throttle(app):
+    """Build the LoginThrottle for this app from the LOGIN_THROTTLE_* settings"""
+    if not app.config.get('LOGIN_THROTTLE_ENABLED', True):
+        return
+    if app.config.get('LOGIN_THROTTLE_STORE') == 'sqlite':
+        path = app.config.get('LOGIN_THROTTLE_DB') or os.path.join(app.instance_path, 'login_throttle.db')
+        store = SQLiteBucketStore(path)
+    else:
+        store = MemoryBucketStore(app.config.get('LOGIN_THROTTLE_MAX_KEYS', 100_000))
+    app.extensions['login_throttle'] = LoginThrottle(
+        store,
+        app.config.get('LOGIN_IP_BURST', 20), app.config.get('LOGIN_IP_PER_MINUTE', 10),
+        app.config.get('LOGIN_USER_BURST', 5), app.config.get('LOGIN_USER_PER_MINUTE', 2),
+        app.config.get('REGISTER_IP_BURST', 10), app.config.get('REGISTER_IP_PER_MINUTE', 5),
+    )
+
+
+def get_throttle():
+    return current_app.extensions.get('login_throttle')
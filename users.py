@@ -0,0 +1,95 @@
+import csv
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from sqlalchemy import select
+from werkzeug.security import generate_password_hash
+from database import db, insert_ignore
+from models import User, Role
+import passwords
+
+
+def create_user(username, password_hash, role=Role.USER):
+    """Insert one user in a single statement; False if the username is taken"""
+    return insert_ignore(User, [{"username": username, "password_hash": password_hash, "role": role}],
+                         ["username"]) == 1
+
+
+def username_taken(username):
+    """One indexed lookup, so a taken name is refused before paying for a hash"""
+    return db.session.scalar(select(User.id).where(User.username == username).limit(1)) is not None
+
+
+def _read_csv(path):
+    """Yield (line number, username, password, role) from a members CSV.
+
+    The file needs a header with "username" and "password" columns and may
+    have a "role" column ("user" or "admin").
+    """
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        missing = {"username", "password"} - set(reader.fieldnames or ())
+        if missing:
+            raise ValueError(f"{path} is missing column(s): {', '.join(sorted(missing))}")
+        for row in reader:
+            yield reader.line_num, (row["username"] or "").strip(), row["password"] or "", \
+                (row.get("role") or "user").strip().lower()
+
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def import_users_csv(path, batch_size=2000, workers=None, method=None, report=print):
+    """Create users from a CSV file, hashing passwords on every core.
+
+    Each batch is hashed in parallel, inserted with one ON CONFLICT DO
+    NOTHING statement and committed, so existing usernames (and repeats
+    within the file) are skipped without being hashed, and an interrupted
+    import can simply be run again. Returns {'inserted', 'skipped', 'invalid'}.
+    """
+    method = method or passwords.hash_method()
+    workers = workers or os.cpu_count() or 1
+    roles = {role.value: role for role in Role}
+    counts = {"inserted": 0, "skipped": 0, "invalid": 0}
+    started = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        for batch in _batches(_read_csv(path), batch_size):
+            # Names that already exist aren't worth hashing; the insert below
+            # still ignores conflicts, so this lookup can't race
+            names = [username for _, username, _, _ in batch]
+            taken = set(db.session.scalars(select(User.username).where(User.username.in_(names))))
+            valid = []
+            for line, username, password, role in batch:
+                if not username or not password or role not in roles or len(username) > 80:
+                    report(f"line {line}: skipped, needs a username (max 80 chars), a password and role user/admin")
+                    counts["invalid"] += 1
+                elif username in taken:
+                    counts["skipped"] += 1
+                else:
+                    taken.add(username)
+                    valid.append((username, password, roles[role]))
+
+            hashes = pool.map(generate_password_hash, [password for _, password, _ in valid],
+                              [method] * len(valid), chunksize=max(1, len(valid) // (workers * 4)))
+            inserted = insert_ignore(User, [
+                {"username": username, "password_hash": password_hash, "role": role}
+                for (username, _, role), password_hash in zip(valid, hashes)
+            ], ["username"])
+            db.session.commit()
+
+            counts["inserted"] += inserted
+            counts["skipped"] += len(valid) - inserted
+            done = sum(counts.values())
+            report(f"{done:,} rows, {counts['inserted']:,} inserted "
+                   f"({done / (time.perf_counter() - started):,.0f} rows/s)")
+    return counts
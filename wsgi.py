@@ -0,0 +1,4 @@
+# Entry point for WSGI servers, e.g. `gunicorn wsgi:app`
+from main import create_app
+
+app = create_app()